@@ -4,16 +4,23 @@ Enhanced version of Node.js AI question generator
 """
 
 import os
-import json
 import asyncio
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-import google.generativeai as genai
-from pydantic import BaseModel
+import hashlib
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError
+from app.logger import get_logger
+
+logger = get_logger(__name__)
 
 class QuestionOption(BaseModel):
     text: str
     is_correct: bool = False
+    
+    class Config:
+        frozen = True
+        extra = "ignore"
 
 class GeneratedQuestion(BaseModel):
     question_text: str
@@ -30,6 +37,223 @@ class GeneratedQuestion(BaseModel):
     question_type: str = "conceptual"
     estimated_time: int = 60
     skill_tested: str
+    
+    class Config:
+        frozen = True
+        extra = "ignore"
+
+class GeminiQuestionPayload(BaseModel):
+    """Schema for the JSON object Gemini is asked to return"""
+    question_text: str
+    options: List[QuestionOption] = Field(..., min_length=4, max_length=4)
+    correct_answer: int = Field(..., ge=0, le=3, strict=True)
+    explanation: str
+    difficulty_score: float
+    tags: List[str] = []
+    skill_tested: str
+
+# Fallback question templates
+_FALLBACK_TEMPLATES = {
+    "Computer Science": {
+        "Object-Oriented Programming": {
+            "easy": {
+                "question": "What is the main principle of Object-Oriented Programming?",
+                "options": [
+                    "Procedural programming",
+                    "Encapsulation",
+                    "Linear programming",
+                    "Functional programming"
+                ],
+                "correct": 1,
+                "explanation": "Encapsulation is a fundamental principle of OOP that bundles data and methods together."
+            },
+            "medium": {
+                "question": "Which OOP concept allows a class to inherit properties from another class?",
+                "options": [
+                    "Polymorphism",
+                    "Inheritance",
+                    "Encapsulation",
+                    "Abstraction"
+                ],
+                "correct": 1,
+                "explanation": "Inheritance allows a class to inherit properties and methods from a parent class."
+            },
+            "hard": {
+                "question": "In Java, what happens when you override a method with a more restrictive access modifier?",
+                "options": [
+                    "It compiles successfully",
+                    "It throws a runtime exception",
+                    "It causes a compilation error",
+                    "It works but with reduced functionality"
+                ],
+                "correct": 2,
+                "explanation": "Overriding with a more restrictive access modifier causes a compilation error in Java."
+            }
+        },
+        "Database Fundamentals": {
+            "easy": {
+                "question": "What does SQL stand for?",
+                "options": [
+                    "Structured Query Language",
+                    "Simple Query Language",
+                    "Standard Query Language",
+                    "System Query Language"
+                ],
+                "correct": 0,
+                "explanation": "SQL stands for Structured Query Language, used for managing relational databases."
+            },
+            "medium": {
+                "question": "Which SQL command is used to retrieve data from a database?",
+                "options": [
+                    "INSERT",
+                    "UPDATE",
+                    "SELECT",
+                    "DELETE"
+                ],
+                "correct": 2,
+                "explanation": "SELECT is used to retrieve data from database tables."
+            },
+            "hard": {
+                "question": "What is the difference between INNER JOIN and LEFT JOIN?",
+                "options": [
+                    "No difference",
+                    "INNER JOIN returns only matching rows, LEFT JOIN returns all rows from left table",
+                    "LEFT JOIN is faster than INNER JOIN",
+                    "INNER JOIN is used for updates, LEFT JOIN for selects"
+                ],
+                "correct": 1,
+                "explanation": "INNER JOIN returns only matching rows, while LEFT JOIN returns all rows from the left table and matching rows from the right table."
+            }
+        }
+    }
+}
+
+_DIFFICULTY_SCORES = {"easy": 30, "medium": 60, "hard": 85}
+
+
+def _build_fallback_question(template_data: Dict[str, Any], subject: str, topic: str, difficulty: str) -> GeneratedQuestion:
+    """Build a fallback question from a template entry"""
+    options = [
+        QuestionOption(text=option_text, is_correct=(i == template_data["correct"]))
+        for i, option_text in enumerate(template_data["options"])
+    ]
+    
+    return GeneratedQuestion(
+        question_text=template_data["question"],
+        options=options,
+        correct_answer=template_data["correct"],
+        explanation=template_data["explanation"],
+        difficulty=difficulty,
+        difficulty_score=_DIFFICULTY_SCORES.get(difficulty, 60),
+        subject=subject,
+        topic=topic,
+        subtopic="General",
+        tags=[subject.lower(), topic.lower().replace(" ", "-")],
+        cognitive_level="understand",
+        question_type="conceptual",
+        estimated_time=60,
+        skill_tested=f"{topic} knowledge"
+    )
+
+
+# Fallback questions built once at import, keyed by (subject, topic, difficulty)
+_FALLBACK_INDEX: Dict[Tuple[str, str, str], GeneratedQuestion] = {}
+for _subject, _topics in _FALLBACK_TEMPLATES.items():
+    for _topic, _levels in _topics.items():
+        for _difficulty in ("easy", "medium", "hard"):
+            _template = _levels.get(_difficulty, _levels["medium"])
+            _FALLBACK_INDEX[(_subject, _topic, _difficulty)] = _build_fallback_question(
+                _template, _subject, _topic, _difficulty
+            )
+
+
+_DIFFICULTY_DESCRIPTIONS = {
+    "easy": "basic understanding and recall",
+    "medium": "application and analysis",
+    "hard": "complex problem-solving and evaluation"
+}
+
+# Question prompt, filled in with str.format_map per question
+_PROMPT_TEMPLATE = """
+Generate a high-quality multiple-choice question for an educational assessment platform.
+
+Subject: {subject}
+Topic: {topic}
+Difficulty: {difficulty} ({difficulty_description})
+Subtopic: {subtopic}
+Skill Tested: {skill_tested}
+
+Requirements:
+1. Create a clear, well-structured question
+2. Provide exactly 4 options (A, B, C, D)
+3. Only one option should be correct
+4. Include a detailed explanation
+5. Make it appropriate for {difficulty} level
+6. Ensure the question tests practical understanding
+
+Format your response as JSON:
+{{
+    "question_text": "Your question here",
+    "options": [
+        {{"text": "Option A", "is_correct": false}},
+        {{"text": "Option B", "is_correct": false}},
+        {{"text": "Option C", "is_correct": true}},
+        {{"text": "Option D", "is_correct": false}}
+    ],
+    "correct_answer": 2,
+    "explanation": "Detailed explanation of why the correct answer is right",
+    "difficulty_score": 75,
+    "tags": ["tag1", "tag2"],
+    "skill_tested": "Specific skill being tested"
+}}
+
+Generate the question now:
+"""
+
+
+class _JsonObjectScanner:
+    """Find the first balanced {...} object in text fed in one or more pieces"""
+    
+    def __init__(self):
+        self.start = -1
+        self.offset = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, text: str) -> Optional[int]:
+        """Scan the next piece of text; return the end offset once the object closes"""
+        for i, char in enumerate(text, self.offset):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                if self.depth:
+                    self.in_string = True
+            elif char == '{':
+                if self.depth == 0:
+                    self.start = i
+                self.depth += 1
+            elif char == '}' and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.offset = i + 1
+                    return self.offset
+        
+        self.offset += len(text)
+        return None
+
+
+def _extract_first_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} object in text, scanning it once"""
+    scanner = _JsonObjectScanner()
+    end = scanner.feed(text)
+    return text[scanner.start:end] if end is not None else None
+
 
 class GeminiQuestionGenerator:
     def __init__(self):
@@ -37,17 +261,25 @@ class GeminiQuestionGenerator:
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.model = None
         self.fallback_enabled = True
+        self.max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", 20))
+        self.strict_validation = os.getenv("GEMINI_STRICT_VALIDATION", "False").lower() == "true"
+        
+        # LRU cache of parsed questions keyed by prompt hash
+        self.cache_size = int(os.getenv("GEMINI_CACHE_SIZE", 256))
+        self._cache: "OrderedDict[str, GeneratedQuestion]" = OrderedDict()
         
         if self.api_key:
             try:
+                # Imported here so fallback mode doesn't pay for the SDK import
+                import google.generativeai as genai
                 genai.configure(api_key=self.api_key)
                 self.model = genai.GenerativeModel('gemini-1.5-flash')
-                print("✅ Gemini AI initialized successfully")
+                logger.info("✅ Gemini AI initialized successfully")
             except Exception as e:
-                print(f"❌ Gemini AI initialization failed: {e}")
+                logger.error("❌ Gemini AI initialization failed: %s", e)
                 self.model = None
         else:
-            print("⚠️ GEMINI_API_KEY not found, using fallback mode")
+            logger.warning("⚠️ GEMINI_API_KEY not found, using fallback mode")
             self.model = None
 
     async def generate_question(
@@ -56,7 +288,8 @@ class GeminiQuestionGenerator:
         topic: str,
         difficulty: str = "medium",
         subtopic: Optional[str] = None,
-        skill_tested: Optional[str] = None
+        skill_tested: Optional[str] = None,
+        use_cache: bool = True
     ) -> Optional[GeneratedQuestion]:
         """Generate a question using Gemini AI"""
         
@@ -67,22 +300,61 @@ class GeminiQuestionGenerator:
             # Create prompt for question generation
             prompt = self._create_question_prompt(subject, topic, difficulty, subtopic, skill_tested)
             
-            # Generate question using Gemini
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            # Serve repeated prompts from the cache
+            cache_key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+            cached = self._cache_get(cache_key) if use_cache else None
+            if cached:
+                return cached
             
-            if response and response.text:
+            # Stream the question from Gemini, stopping once the JSON object is complete
+            response = await self.model.generate_content_async(prompt, stream=True)
+            response_text = await self._read_streamed_reply(response)
+            
+            if response_text:
                 # Parse the response
-                question_data = self._parse_gemini_response(response.text, subject, topic, difficulty)
+                question_data = self._parse_gemini_response(response_text, subject, topic, difficulty)
                 if question_data:
-                    return GeneratedQuestion(**question_data)
+                    if self.strict_validation:
+                        question = GeneratedQuestion(**question_data)
+                    else:
+                        # Already validated by GeminiQuestionPayload
+                        question = GeneratedQuestion.model_construct(**question_data)
+                    self._cache_put(cache_key, question)
+                    return question
             
             # If parsing fails, use fallback
             return await self.generate_fallback_question(subject, topic, difficulty, subtopic, skill_tested)
             
         except Exception as e:
-            print(f"❌ Gemini API error: {e}")
+            logger.error("❌ Gemini API error: %s", e)
             return await self.generate_fallback_question(subject, topic, difficulty, subtopic, skill_tested)
 
+    async def _read_streamed_reply(self, response) -> str:
+        """Accumulate streamed chunks until the first JSON object has been closed"""
+        parts = []
+        scanner = _JsonObjectScanner()
+        # Close the stream explicitly so stopping early releases the connection
+        async with aclosing(response.__aiter__()) as stream:
+            async for chunk in stream:
+                parts.append(chunk.text)
+                if scanner.feed(chunk.text) is not None:
+                    break
+        return "".join(parts)
+
+    def _cache_get(self, key: str) -> Optional[GeneratedQuestion]:
+        """Look up a cached question and mark it as recently used"""
+        question = self._cache.get(key)
+        if question is not None:
+            self._cache.move_to_end(key)
+        return question
+
+    def _cache_put(self, key: str, question: GeneratedQuestion):
+        """Store a question, evicting the least recently used entry when full"""
+        self._cache[key] = question
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
     def _create_question_prompt(
         self,
         subject: str,
@@ -93,98 +365,43 @@ class GeminiQuestionGenerator:
     ) -> str:
         """Create a detailed prompt for question generation"""
         
-        difficulty_descriptions = {
-            "easy": "basic understanding and recall",
-            "medium": "application and analysis",
-            "hard": "complex problem-solving and evaluation"
-        }
-        
-        prompt = f"""
-Generate a high-quality multiple-choice question for an educational assessment platform.
-
-Subject: {subject}
-Topic: {topic}
-Difficulty: {difficulty} ({difficulty_descriptions.get(difficulty, 'medium')})
-Subtopic: {subtopic or 'General'}
-Skill Tested: {skill_tested or 'General knowledge'}
-
-Requirements:
-1. Create a clear, well-structured question
-2. Provide exactly 4 options (A, B, C, D)
-3. Only one option should be correct
-4. Include a detailed explanation
-5. Make it appropriate for {difficulty} level
-6. Ensure the question tests practical understanding
-
-Format your response as JSON:
-{{
-    "question_text": "Your question here",
-    "options": [
-        {{"text": "Option A", "is_correct": false}},
-        {{"text": "Option B", "is_correct": false}},
-        {{"text": "Option C", "is_correct": true}},
-        {{"text": "Option D", "is_correct": false}}
-    ],
-    "correct_answer": 2,
-    "explanation": "Detailed explanation of why the correct answer is right",
-    "difficulty_score": 75,
-    "tags": ["tag1", "tag2"],
-    "skill_tested": "Specific skill being tested"
-}}
-
-Generate the question now:
-"""
-        return prompt
+        return _PROMPT_TEMPLATE.format_map({
+            "subject": subject,
+            "topic": topic,
+            "difficulty": difficulty,
+            "difficulty_description": _DIFFICULTY_DESCRIPTIONS.get(difficulty, "medium"),
+            "subtopic": subtopic or "General",
+            "skill_tested": skill_tested or "General knowledge"
+        })
 
     def _parse_gemini_response(self, response_text: str, subject: str, topic: str, difficulty: str) -> Optional[Dict[str, Any]]:
         """Parse Gemini response and extract question data"""
         try:
             # Try to extract JSON from response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
+            json_str = _extract_first_json_object(response_text)
             
-            if start_idx != -1 and end_idx != -1:
-                json_str = response_text[start_idx:end_idx]
-                question_data = json.loads(json_str)
+            if json_str is not None:
+                # Parse and validate in one pass
+                payload = GeminiQuestionPayload.model_validate_json(json_str)
                 
-                # Validate and clean the data
-                if self._validate_question_data(question_data):
-                    # Add missing fields
-                    question_data.update({
-                        "subject": subject,
-                        "topic": topic,
-                        "difficulty": difficulty,
-                        "cognitive_level": "understand",
-                        "question_type": "conceptual",
-                        "estimated_time": 60
-                    })
-                    return question_data
+                # Add missing fields
+                question_data = dict(payload)
+                question_data.update({
+                    "subject": subject,
+                    "topic": topic,
+                    "difficulty": difficulty,
+                    "cognitive_level": "understand",
+                    "question_type": "conceptual",
+                    "estimated_time": 60
+                })
+                return question_data
             
             return None
             
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"❌ Failed to parse Gemini response: {e}")
+        except ValidationError as e:
+            logger.error("❌ Failed to parse Gemini response: %s", e)
             return None
 
-    def _validate_question_data(self, data: Dict[str, Any]) -> bool:
-        """Validate question data structure"""
-        required_fields = ["question_text", "options", "correct_answer", "explanation"]
-        
-        for field in required_fields:
-            if field not in data:
-                return False
-        
-        # Validate options
-        if not isinstance(data["options"], list) or len(data["options"]) != 4:
-            return False
-        
-        # Validate correct answer index
-        correct_idx = data["correct_answer"]
-        if not isinstance(correct_idx, int) or correct_idx < 0 or correct_idx > 3:
-            return False
-        
-        return True
-
     async def generate_fallback_question(
         self,
         subject: str,
@@ -195,161 +412,96 @@ Generate the question now:
     ) -> GeneratedQuestion:
         """Generate fallback question when Gemini is not available"""
         
-        # Fallback question templates
-        templates = {
-            "Computer Science": {
-                "Object-Oriented Programming": {
-                    "easy": {
-                        "question": "What is the main principle of Object-Oriented Programming?",
-                        "options": [
-                            "Procedural programming",
-                            "Encapsulation",
-                            "Linear programming",
-                            "Functional programming"
-                        ],
-                        "correct": 1,
-                        "explanation": "Encapsulation is a fundamental principle of OOP that bundles data and methods together."
-                    },
-                    "medium": {
-                        "question": "Which OOP concept allows a class to inherit properties from another class?",
-                        "options": [
-                            "Polymorphism",
-                            "Inheritance",
-                            "Encapsulation",
-                            "Abstraction"
-                        ],
-                        "correct": 1,
-                        "explanation": "Inheritance allows a class to inherit properties and methods from a parent class."
-                    },
-                    "hard": {
-                        "question": "In Java, what happens when you override a method with a more restrictive access modifier?",
-                        "options": [
-                            "It compiles successfully",
-                            "It throws a runtime exception",
-                            "It causes a compilation error",
-                            "It works but with reduced functionality"
-                        ],
-                        "correct": 2,
-                        "explanation": "Overriding with a more restrictive access modifier causes a compilation error in Java."
-                    }
-                },
-                "Database Fundamentals": {
-                    "easy": {
-                        "question": "What does SQL stand for?",
-                        "options": [
-                            "Structured Query Language",
-                            "Simple Query Language",
-                            "Standard Query Language",
-                            "System Query Language"
-                        ],
-                        "correct": 0,
-                        "explanation": "SQL stands for Structured Query Language, used for managing relational databases."
-                    },
-                    "medium": {
-                        "question": "Which SQL command is used to retrieve data from a database?",
-                        "options": [
-                            "INSERT",
-                            "UPDATE",
-                            "SELECT",
-                            "DELETE"
-                        ],
-                        "correct": 2,
-                        "explanation": "SELECT is used to retrieve data from database tables."
-                    },
-                    "hard": {
-                        "question": "What is the difference between INNER JOIN and LEFT JOIN?",
-                        "options": [
-                            "No difference",
-                            "INNER JOIN returns only matching rows, LEFT JOIN returns all rows from left table",
-                            "LEFT JOIN is faster than INNER JOIN",
-                            "INNER JOIN is used for updates, LEFT JOIN for selects"
-                        ],
-                        "correct": 1,
-                        "explanation": "INNER JOIN returns only matching rows, while LEFT JOIN returns all rows from the left table and matching rows from the right table."
-                    }
-                }
-            }
-        }
-        
-        # Get template based on subject and topic
-        template_data = None
-        if subject in templates and topic in templates[subject]:
-            template_data = templates[subject][topic].get(difficulty, templates[subject][topic]["medium"])
+        proto = _FALLBACK_INDEX.get((subject, topic, difficulty))
+        if proto is None and (subject, topic, "medium") in _FALLBACK_INDEX:
+            # Unknown difficulty level, reuse the topic's medium question
+            proto = _FALLBACK_INDEX[(subject, topic, "medium")].model_copy(update={"difficulty": difficulty})
         
         # Default fallback if no template found
-        if not template_data:
-            template_data = {
-                "question": f"What is a key concept in {topic}?",
-                "options": [
-                    "Option A",
-                    "Option B", 
-                    "Option C",
-                    "Option D"
-                ],
-                "correct": 1,
-                "explanation": f"This question tests understanding of {topic} concepts."
-            }
-        
-        # Create options
-        options = []
-        for i, option_text in enumerate(template_data["options"]):
-            options.append(QuestionOption(
-                text=option_text,
-                is_correct=(i == template_data["correct"])
-            ))
-        
-        # Calculate difficulty score
-        difficulty_scores = {"easy": 30, "medium": 60, "hard": 85}
-        difficulty_score = difficulty_scores.get(difficulty, 60)
+        if proto is None:
+            proto = _build_fallback_question(
+                {
+                    "question": f"What is a key concept in {topic}?",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct": 1,
+                    "explanation": f"This question tests understanding of {topic} concepts."
+                },
+                subject, topic, difficulty
+            )
         
-        return GeneratedQuestion(
-            question_text=template_data["question"],
-            options=options,
-            correct_answer=template_data["correct"],
-            explanation=template_data["explanation"],
-            difficulty=difficulty,
-            difficulty_score=difficulty_score,
-            subject=subject,
-            topic=topic,
-            subtopic=subtopic or "General",
-            tags=[subject.lower(), topic.lower().replace(" ", "-")],
-            cognitive_level="understand",
-            question_type="conceptual",
-            estimated_time=60,
-            skill_tested=skill_tested or f"{topic} knowledge"
-        )
+        return proto.model_copy(update={
+            "subtopic": subtopic or "General",
+            "skill_tested": skill_tested or f"{topic} knowledge"
+        })
 
-    async def generate_multiple_questions(
+    def _plan_questions(
         self,
-        subject: str,
         topics: List[str],
         count: int,
         difficulty_distribution: Dict[str, int] = None
-    ) -> List[GeneratedQuestion]:
-        """Generate multiple questions for an assessment"""
+    ) -> List[Tuple[str, str, bool]]:
+        """Plan (topic, difficulty, use_cache) for every question slot"""
         
         if not difficulty_distribution:
             difficulty_distribution = {"easy": count//3, "medium": count//3, "hard": count//3}
         
-        questions = []
+        easy_cutoff = difficulty_distribution.get("easy", 0)
+        medium_cutoff = easy_cutoff + difficulty_distribution.get("medium", 0)
         
+        # Only the first slot per (topic, difficulty) may reuse a cached question,
+        # otherwise repeated slots would duplicate it within the same assessment
+        seen = set()
+        plan = []
         for i in range(count):
-            # Select topic and difficulty
             topic = topics[i % len(topics)]
-            difficulty = "medium"  # Default
-            
-            # Assign difficulty based on distribution
-            if i < difficulty_distribution.get("easy", 0):
+            if i < easy_cutoff:
                 difficulty = "easy"
-            elif i < difficulty_distribution.get("easy", 0) + difficulty_distribution.get("medium", 0):
+            elif i < medium_cutoff:
                 difficulty = "medium"
             else:
                 difficulty = "hard"
-            
-            # Generate question
-            question = await self.generate_question(subject, topic, difficulty)
-            if question:
-                questions.append(question)
+            plan.append((topic, difficulty, (topic, difficulty) not in seen))
+            seen.add((topic, difficulty))
+        
+        return plan
+
+    async def _generate_slot(
+        self,
+        semaphore: asyncio.Semaphore,
+        subject: str,
+        topic: str,
+        difficulty: str,
+        use_cache: bool
+    ) -> Optional[GeneratedQuestion]:
+        """Generate one planned question, bounded by the shared semaphore"""
+        async with semaphore:
+            return await self.generate_question(subject, topic, difficulty, use_cache=use_cache)
+
+    async def generate_multiple_questions(
+        self,
+        subject: str,
+        topics: List[str],
+        count: int,
+        difficulty_distribution: Dict[str, int] = None
+    ) -> List[GeneratedQuestion]:
+        """Generate multiple questions for an assessment"""
+        
+        # Fan the Gemini calls out concurrently, bounded to stay within the API quota
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *[
+                self._generate_slot(semaphore, subject, topic, difficulty, use_cache)
+                for topic, difficulty, use_cache in self._plan_questions(topics, count, difficulty_distribution)
+            ],
+            return_exceptions=True
+        )
+        
+        questions = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error("❌ Question generation failed: %s", result)
+            elif result:
+                questions.append(result)
         
         return questions
 
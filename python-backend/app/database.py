@@ -3,7 +3,11 @@ Database configuration and connection setup
 """
 
 import os
+import hashlib
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.errors import OperationFailure
 from beanie import init_beanie
 from dotenv import load_dotenv
 
@@ -11,12 +15,17 @@ from app.models.user import User
 from app.models.assessment import Assessment
 from app.models.question import Question
 from app.models.aptitude_test import AptitudeTest
+from app.models.aptitude_attempt import AptitudeAttempt
+from app.logger import get_logger
 
 load_dotenv("config.env")
 
+logger = get_logger(__name__)
+
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    analytics_database = None
 
 db = Database()
 
@@ -26,28 +35,103 @@ async def init_db():
         # MongoDB connection string
         mongo_url = os.getenv("MONGODB_URI", "mongodb://localhost:27017/adaptive_assessment")
         
-        # Create motor client
-        db.client = AsyncIOMotorClient(mongo_url)
+        # Create motor client with a sized pool and wire compression
+        db.client = AsyncIOMotorClient(
+            mongo_url,
+            maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 200)),
+            minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", 10)),
+            compressors=os.getenv("MONGO_COMPRESSORS", "zstd,zlib"),
+            serverSelectionTimeoutMS=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 3000)),
+            retryWrites=True,
+            uuidRepresentation="standard",
+            appname="adaptive-python-backend"
+        )
         db.database = db.client.adaptive_assessment
         
+        # Read-heavy analytics queries may be served by secondaries
+        db.analytics_database = db.client.get_database(
+            "adaptive_assessment",
+            read_preference=ReadPreference.SECONDARY_PREFERRED
+        )
+        
         # Initialize beanie with models
         await init_beanie(
             database=db.database,
-            document_models=[User, Assessment, Question, AptitudeTest]
+            document_models=[User, Assessment, Question, AptitudeTest, AptitudeAttempt]
         )
+        await drop_legacy_indexes()
+        await migrate_aptitude_history()
+        await backfill_full_name_search()
         
-        print("✅ MongoDB connected successfully")
+        logger.info("✅ MongoDB connected successfully")
         
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        logger.error("❌ Database connection failed: %s", e)
         raise e
 
+# Indexes replaced by compound indexes declared on the models
+LEGACY_INDEXES = {
+    AptitudeTest: ["questions.category_1", "questions.difficulty_1"],
+    Assessment: ["user_id_1", "status_1"],
+    Question: ["subject_1"],
+}
+
+async def drop_legacy_indexes():
+    """Drop superseded indexes left behind by earlier versions"""
+    for model, index_names in LEGACY_INDEXES.items():
+        collection = model.get_motor_collection()
+        existing = await collection.index_information()
+        for index_name in index_names:
+            if index_name in existing:
+                try:
+                    await collection.drop_index(index_name)
+                    logger.info("🗑️ Dropped legacy index %s", index_name)
+                except OperationFailure as e:
+                    logger.warning("⚠️ Could not drop legacy index %s: %s", index_name, e)
+
+def _legacy_attempt_id(user_id: ObjectId, index: int) -> ObjectId:
+    """Deterministic _id for a user's index-th embedded history entry"""
+    return ObjectId(hashlib.sha1(f"{user_id}:{index}".encode()).digest()[:12])
+
+async def migrate_aptitude_history():
+    """Move aptitude history embedded on users into the aptitude_attempts collection"""
+    users = User.get_motor_collection()
+    attempts = AptitudeAttempt.get_motor_collection()
+    migrated = 0
+    async for user in users.find({"aptitude_history": {"$exists": True}}, {"aptitude_history": 1}):
+        # Upserts on deterministic _ids, so a rerun after a crash before the $unset,
+        # or another worker migrating the same user, cannot duplicate attempts
+        for index, entry in enumerate(user.get("aptitude_history") or []):
+            entry = {k: v for k, v in entry.items() if k != "_id"}
+            result = await attempts.update_one(
+                {"_id": _legacy_attempt_id(user["_id"], index)},
+                {"$setOnInsert": {**entry, "user_id": str(user["_id"])}},
+                upsert=True
+            )
+            migrated += result.upserted_id is not None
+        await users.update_one({"_id": user["_id"]}, {"$unset": {"aptitude_history": ""}})
+    if migrated:
+        logger.info("📦 Moved %d embedded aptitude history entries to %s", migrated, attempts.name)
+
+async def backfill_full_name_search():
+    """Fill full_name_search on users written before the field existed"""
+    result = await User.get_motor_collection().update_many(
+        {"full_name_search": {"$exists": False}},
+        [{"$set": {"full_name_search": {"$toLower": {"$concat": ["$first_name", " ", "$last_name"]}}}}]
+    )
+    if result.modified_count:
+        logger.info("📦 Backfilled full_name_search on %d users", result.modified_count)
+
 async def close_db():
     """Close database connection"""
     if db.client:
         db.client.close()
-        print("🔌 Database connection closed")
+        logger.info("🔌 Database connection closed")
 
 def get_database():
     """Get database instance"""
     return db.database
+
+def get_analytics_database():
+    """Get database instance that prefers secondaries for analytics reads"""
+    return db.analytics_database
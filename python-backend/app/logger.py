@@ -0,0 +1,36 @@
+"""
+Logging configuration for Python backend
+Records are queued by the caller and written to stdout by a background thread
+"""
+
+import os
+import queue
+import atexit
+import logging
+import logging.handlers
+
+_listener = None
+
+def setup_logging():
+    """Route the "app" logger through a queue drained by a listener thread"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    app_logger.propagate = False
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a module logger, configuring the queue on first use"""
+    setup_logging()
+    return logging.getLogger(name)
@@ -3,20 +3,25 @@ FastAPI Application for Adaptive Assessment Platform
 Python Backend - Alternative to Node.js implementation
 """
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import os
-import json
+import asyncio
+import orjson
 from dotenv import load_dotenv
 
 from app.database import init_db
+from app.responses import ORJSONResponse
 from app.routes import auth, assessments, aptitude, users, analytics, questions, admin, assignments
+from app.logger import get_logger
 
 # Load environment variables
 load_dotenv("config.env")
 
+logger = get_logger(__name__)
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
@@ -33,22 +38,31 @@ class ConnectionManager:
         await websocket.send_text(message)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Remove disconnected connections
+        # Snapshot the connections so concurrent connects/disconnects don't race the loop
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True
+        )
+        
+        # Remove disconnected connections
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception) and connection in self.active_connections:
                 self.active_connections.remove(connection)
 
 manager = ConnectionManager()
 
+# Serialized once, the pong reply never changes
+PONG_MESSAGE = orjson.dumps({"type": "pong"}).decode()
+
 # Create FastAPI app
 app = FastAPI(
     title="Adaptive Assessment Platform - Python Backend",
     description="Python implementation of the adaptive assessment system",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -80,13 +94,13 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             # Handle different message types
             if message.get("type") == "ping":
-                await manager.send_personal_message(json.dumps({"type": "pong"}), websocket)
+                await manager.send_personal_message(PONG_MESSAGE, websocket)
             elif message.get("type") == "broadcast":
-                await manager.broadcast(json.dumps(message))
+                await manager.broadcast(orjson.dumps(message).decode())
             else:
                 # Echo back the message
                 await manager.send_personal_message(data, websocket)
@@ -103,9 +117,9 @@ async def startup_event():
     from app.utils.aptitude_questions import create_sample_aptitude_tests
     await create_sample_aptitude_tests()
     
-    print("🚀 Python Backend Server Started!")
-    print("📊 Database connected successfully")
-    print("🔗 API Documentation available at: http://localhost:8001/docs")
+    logger.info("🚀 Python Backend Server Started!")
+    logger.info("📊 Database connected successfully")
+    logger.info("🔗 API Documentation available at: http://localhost:8001/docs")
 
 @app.get("/")
 async def root():
@@ -145,5 +159,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8001,  # Different port from Node.js (5000)
         reload=True,
-        log_level="info"
+        log_level="info",
+        # uvloop and httptools ship with uvicorn[standard]; set EVENT_LOOP=asyncio elsewhere
+        loop=os.getenv("EVENT_LOOP", "uvloop"),
+        http="httptools"
     )
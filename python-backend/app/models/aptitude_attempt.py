@@ -0,0 +1,33 @@
+"""
+AptitudeAttempt model for Python backend
+Completed aptitude tests, stored apart from User so auth and admin reads stay small
+"""
+
+from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from typing import List
+from datetime import datetime
+from app.models.user import AptitudeAnswer
+
+class AptitudeAttempt(Document):
+    user_id: str
+    test_id: str
+    test_title: str
+    test_type: str
+    score: float
+    passed: bool
+    completed_at: datetime
+    time_spent: float
+    answers: List[AptitudeAnswer]
+
+    class Settings:
+        name = "aptitude_attempts"
+        indexes = [
+            # User history, newest first; also serves plain user_id lookups
+            IndexModel([("user_id", ASCENDING), ("completed_at", DESCENDING)], name="user_id_completed")
+        ]
+
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
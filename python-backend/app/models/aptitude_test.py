@@ -3,11 +3,13 @@ AptitudeTest model for Python backend
 Equivalent to Node.js AptitudeTest model
 """
 
-from beanie import Document, Indexed
-from pydantic import BaseModel, Field
+from beanie import Document, PydanticObjectId, Insert, Replace, Save, SaveChanges, before_event
+from pymongo import ASCENDING, IndexModel
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 from enum import Enum
+from app.utils.aptitude_stats import COMPLETION_WEIGHT, SCORE_WEIGHT
 
 class AptitudeTestType(str, Enum):
     QUANTITATIVE = "quantitative"
@@ -40,6 +42,10 @@ class CognitiveLevel(str, Enum):
 class AptitudeQuestionOption(BaseModel):
     text: str
     is_correct: bool = False
+    
+    class Config:
+        frozen = True
+        extra = "ignore"
 
 class AptitudeQuestion(BaseModel):
     question_text: str
@@ -52,6 +58,10 @@ class AptitudeQuestion(BaseModel):
     estimated_time: int = 60  # in seconds
     skill_tested: str
     cognitive_level: CognitiveLevel = CognitiveLevel.APPLY
+    
+    class Config:
+        frozen = True
+        extra = "ignore"
 
 class TestSection(BaseModel):
     name: str
@@ -69,6 +79,35 @@ class UsageStats(BaseModel):
     total_attempts: int = 0
     average_score: float = 0.0
     completion_rate: float = 0.0
+    # Running totals behind the averages, so each attempt is an exact increment
+    total_score_sum: float = 0.0
+    total_completed_count: int = 0
+
+    @model_validator(mode="before")
+    @classmethod
+    def backfill_running_totals(cls, data: Any) -> Any:
+        """Derive running totals for documents stored with averages only"""
+        if isinstance(data, dict) and "total_score_sum" not in data:
+            attempts = data.get("total_attempts", 0)
+            data = dict(data)
+            data["total_score_sum"] = data.get("average_score", 0.0) * attempts
+            data["total_completed_count"] = round(data.get("completion_rate", 0.0) * attempts)
+        return data
+
+    @model_validator(mode="after")
+    def sync_averages(self) -> "UsageStats":
+        """Keep the stored averages consistent with the running totals"""
+        self.refresh_averages()
+        return self
+
+    def refresh_averages(self):
+        """Recompute average_score and completion_rate from the running totals"""
+        if self.total_attempts == 0:
+            self.average_score = 0.0
+            self.completion_rate = 0.0
+        else:
+            self.average_score = self.total_score_sum / self.total_attempts
+            self.completion_rate = self.total_completed_count / self.total_attempts
 
 class AptitudeTest(Document):
     title: str
@@ -82,16 +121,47 @@ class AptitudeTest(Document):
     
     is_active: bool = True
     created_by: str  # User ID
+    updated_at: datetime = Field(default_factory=datetime.now)
 
     class Settings:
         name = "aptitude_tests"
         indexes = [
             "type",
             "is_active",
-            "questions.category",
-            "questions.difficulty"
+            # One compound multikey index for category + difficulty lookups,
+            # covering active tests only
+            IndexModel(
+                [("questions.category", ASCENDING), ("questions.difficulty", ASCENDING)],
+                name="active_questions_category_difficulty",
+                partialFilterExpression={"is_active": True}
+            ),
+            # Sample tests are seeded by title; concurrent workers seeding at startup
+            # collide here instead of inserting duplicates
+            IndexModel(
+                [("title", ASCENDING)],
+                name="system_title_unique",
+                unique=True,
+                partialFilterExpression={"created_by": "system"}
+            )
         ]
 
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def touch_updated_at(self):
+        """Stamp the write time used to version the test listing"""
+        self.updated_at = datetime.now()
+
+    @classmethod
+    async def active_version(cls) -> str:
+        """Fingerprint of the active tests (count + latest write), cheap to compare against an ETag"""
+        stats = await cls.get_motor_collection().aggregate([
+            {"$match": {"is_active": True}},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "updated_at": {"$max": "$updated_at"}}}
+        ]).to_list(1)
+        if not stats:
+            return "0"
+        updated_at = stats[0]["updated_at"]
+        return f"{stats[0]['count']}-{updated_at.timestamp() if updated_at else 0}"
+
     def calculate_effectiveness(self) -> float:
         """Calculate test effectiveness"""
         if self.usage_stats.total_attempts == 0:
@@ -101,19 +171,15 @@ class AptitudeTest(Document):
         average_score = self.usage_stats.average_score
         
         # Effectiveness formula: balances completion rate and average score
-        return (completion_rate * 0.4 + average_score * 0.6)
+        return (completion_rate * COMPLETION_WEIGHT + average_score * SCORE_WEIGHT)
 
     def update_usage_stats(self, score: float, completed: bool):
         """Update usage statistics"""
         self.usage_stats.total_attempts += 1
-        
-        # Update average score
-        total_score = self.usage_stats.average_score * (self.usage_stats.total_attempts - 1) + score
-        self.usage_stats.average_score = total_score / self.usage_stats.total_attempts
-        
-        # Update completion rate
-        total_completed = self.usage_stats.completion_rate * (self.usage_stats.total_attempts - 1) + (1 if completed else 0)
-        self.usage_stats.completion_rate = total_completed / self.usage_stats.total_attempts
+        self.usage_stats.total_score_sum += score
+        self.usage_stats.total_completed_count += int(completed)
+        # Averages are stored next to the totals for raw-Mongo readers (analytics pipeline)
+        self.usage_stats.refresh_averages()
 
     def get_questions_by_category(self, category: QuestionCategory) -> List[AptitudeQuestion]:
         """Get questions filtered by category"""
@@ -143,3 +209,23 @@ class AptitudeTest(Document):
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+
+class AptitudeTestSummary(BaseModel):
+    """Listing view of an AptitudeTest; counts questions in the database instead of loading them"""
+    id: PydanticObjectId = Field(alias="_id")
+    title: str
+    description: Optional[str] = None
+    type: AptitudeTestType
+    config: AptitudeTestConfig = AptitudeTestConfig()
+    usage_stats: UsageStats = UsageStats()
+    questions_count: int = 0
+
+    class Settings:
+        projection = {
+            "title": 1,
+            "description": 1,
+            "type": 1,
+            "config": 1,
+            "usage_stats": 1,
+            "questions_count": {"$size": {"$ifNull": ["$questions", []]}}
+        }
@@ -3,11 +3,16 @@ Assessment model for Python backend
 Equivalent to Node.js Assessment model
 """
 
-from beanie import Document, Indexed
+from beanie import Document, Indexed, PydanticObjectId
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime
 from enum import Enum
+from bisect import bisect_right
+import time
+from pymongo import ASCENDING, DESCENDING, IndexModel
+import numpy as np
+from app.utils.ability_math import difficulty_factor, fisher_information, step_ability
 
 class AssessmentType(str, Enum):
     PRE_ASSESSMENT = "pre-assessment"
@@ -51,6 +56,10 @@ class Grade(str, Enum):
     D = "D"
     F = "F"
 
+# Lower percentage bound of each grade band above F, in ascending order
+_GRADE_THRESHOLDS = (50, 60, 65, 70, 75, 80, 90)
+_GRADES = (Grade.F, Grade.D, Grade.C, Grade.C_PLUS, Grade.B, Grade.B_PLUS, Grade.A, Grade.A_PLUS)
+
 class AssessmentConfig(BaseModel):
     totalQuestions: int = Field(alias="totalQuestions")
     timeLimit: int = Field(alias="timeLimit")  # in seconds
@@ -61,6 +70,12 @@ class AssessmentConfig(BaseModel):
     class Config:
         populate_by_name = True
 
+class ItemParameters(BaseModel):
+    """3PL IRT parameters used for adaptive item selection"""
+    discrimination: float = 0.5  # a
+    difficulty: float = 0.5  # b
+    guessing: float = 0.25  # c
+
 class AssessmentQuestion(BaseModel):
     question_id: str
     order: int
@@ -70,6 +85,7 @@ class AssessmentQuestion(BaseModel):
     is_correct: Optional[bool] = None
     difficulty: Optional[Difficulty] = None
     adaptive_reason: Optional[str] = None
+    item_parameters: ItemParameters = ItemParameters()
 
 class NetworkRecoveryAnswer(BaseModel):
     question_id: str
@@ -191,8 +207,17 @@ class Assessment(Document):
     class Settings:
         name = "assessments"
         indexes = [
-            "user_id",
-            "status",
+            # User history, newest first; also serves plain user_id lookups
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created"),
+            # A student's most recent assessments (listing sorts by _id)
+            IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)], name="user_id_recent"),
+            # Time-ranged status counts on the admin dashboard; also serves plain status filters
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created"),
+            # Completed assessments per student, newest first (instructor views)
+            IndexModel(
+                [("user_id", ASCENDING), ("status", ASCENDING), ("end_time", DESCENDING)],
+                name="user_id_status_end"
+            ),
             "assessment_type",
             "results.score",
             "created_at"
@@ -201,9 +226,14 @@ class Assessment(Document):
     def calculate_score(self) -> AssessmentResults:
         """Calculate assessment score"""
         total_questions = len(self.questions)
-        correct_answers = sum(1 for q in self.questions if q.is_correct is True)
-        incorrect_answers = sum(1 for q in self.questions if q.is_correct is False)
-        answered_questions = sum(1 for q in self.questions if q.is_answered)
+        correct_answers = incorrect_answers = answered_questions = 0
+        for q in self.questions:
+            if q.is_answered:
+                answered_questions += 1
+            if q.is_correct is True:
+                correct_answers += 1
+            elif q.is_correct is False:
+                incorrect_answers += 1
         
         self.results.total_questions = total_questions
         self.results.correct_answers = correct_answers
@@ -215,70 +245,61 @@ class Assessment(Document):
         self.results.score = self.results.percentage
         
         # Determine grade
-        if self.results.percentage >= 90:
-            self.results.grade = Grade.A_PLUS
-        elif self.results.percentage >= 80:
-            self.results.grade = Grade.A
-        elif self.results.percentage >= 75:
-            self.results.grade = Grade.B_PLUS
-        elif self.results.percentage >= 70:
-            self.results.grade = Grade.B
-        elif self.results.percentage >= 65:
-            self.results.grade = Grade.C_PLUS
-        elif self.results.percentage >= 60:
-            self.results.grade = Grade.C
-        elif self.results.percentage >= 50:
-            self.results.grade = Grade.D
-        else:
-            self.results.grade = Grade.F
+        self.results.grade = _GRADES[bisect_right(_GRADE_THRESHOLDS, self.results.percentage)]
         
-        self.results.passed = self.results.percentage >= self.config.passing_score
+        self.results.passed = self.results.percentage >= self.config.passingScore
         
         return self.results
 
-    def update_ability_estimation(self, question_index: int, is_correct: bool, difficulty: str) -> float:
-        """Update adaptive ability estimation"""
+    def update_ability_estimation(self, question_index: int, is_correct: bool, difficulty: str, now: Optional[datetime] = None) -> float:
+        """Update adaptive ability estimation; pass `now` to share one timestamp across a batch of updates"""
         current_ability = self.adaptive_data.final_ability or self.adaptive_data.initial_ability
         
         # Simple ability estimation (can be replaced with more sophisticated IRT)
-        adjustment = 0.1 if is_correct else -0.1
-        difficulty_factor = 0.5 if difficulty == "easy" else 1.0 if difficulty == "medium" else 1.5
-        
-        new_ability = current_ability + (adjustment * difficulty_factor)
+        new_ability = step_ability(current_ability, is_correct, difficulty_factor(difficulty))
         
         self.adaptive_data.ability_history.append(AbilityHistory(
             question_index=question_index,
             ability=new_ability,
-            timestamp=datetime.now()
+            timestamp=now or datetime.now()
         ))
         
         self.adaptive_data.final_ability = new_ability
         return new_ability
 
+    def _get_item_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Item parameters of all questions as (a, b, c) arrays"""
+        params = [q.item_parameters for q in self.questions]
+        return (
+            np.fromiter((p.discrimination for p in params), dtype=np.float32, count=len(params)),
+            np.fromiter((p.difficulty for p in params), dtype=np.float32, count=len(params)),
+            np.fromiter((p.guessing for p in params), dtype=np.float32, count=len(params))
+        )
+
     def get_next_question(self) -> Optional[AssessmentQuestion]:
         """Get next question for adaptive assessment"""
-        unanswered_questions = [q for q in self.questions if not q.is_answered]
-        
-        if not unanswered_questions:
-            return None
-        
-        # For adaptive assessment, select based on current ability
-        if self.config.adaptive_enabled:
+        # For adaptive assessment, select the item with maximum information at current ability
+        if self.config.adaptiveEnabled:
+            answered = np.fromiter((q.is_answered for q in self.questions), dtype=bool, count=len(self.questions))
+            if answered.all():
+                return None
+            
             current_ability = self.adaptive_data.final_ability or self.adaptive_data.initial_ability
             
-            # Select question with difficulty closest to current ability
-            return min(unanswered_questions, key=lambda q: abs(getattr(q, 'difficulty_score', 0) - current_ability))
+            information = fisher_information(current_ability, *self._get_item_arrays())
+            information[answered] = -np.inf
+            return self.questions[int(np.argmax(information))]
         
-        # For non-adaptive, return next unanswered question
-        return min(unanswered_questions, key=lambda q: q.order)
+        # For non-adaptive, return next unanswered question by order
+        return min((q for q in self.questions if not q.is_answered), key=lambda q: q.order, default=None)
 
-    def is_expired(self) -> bool:
-        """Check if assessment is expired"""
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Check if assessment is expired; `now` is a time.time() timestamp reused across checks"""
         if not self.start_time:
             return False
         
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        return elapsed > self.config.time_limit
+        elapsed = (now if now is not None else time.time()) - self.start_time.timestamp()
+        return elapsed > self.config.timeLimit
 
     def get_progress(self) -> float:
         """Get assessment progress percentage"""
@@ -290,3 +311,57 @@ class Assessment(Document):
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+
+class AssessmentSummary(BaseModel):
+    """Listing view of an Assessment; counts questions in the database instead of loading them"""
+    id: PydanticObjectId = Field(alias="_id")
+    title: str
+    assessment_type: AssessmentType
+    subject: str
+    status: AssessmentStatus = AssessmentStatus.NOT_STARTED
+    last_accessed_at: Optional[datetime] = None
+    results: AssessmentResults = AssessmentResults()
+    questions_count: int = 0
+    answered_count: int = 0
+
+    class Settings:
+        projection = {
+            "title": 1,
+            "assessment_type": 1,
+            "subject": 1,
+            "status": 1,
+            "last_accessed_at": 1,
+            "results": 1,
+            "questions_count": {"$size": {"$ifNull": ["$questions", []]}},
+            "answered_count": {"$size": {"$filter": {
+                "input": {"$ifNull": ["$questions", []]},
+                "cond": "$$this.is_answered"
+            }}}
+        }
+
+    @property
+    def progress(self) -> float:
+        """Assessment progress percentage"""
+        return (self.answered_count / self.questions_count * 100) if self.questions_count > 0 else 0
+
+class CompletedAssessmentSummary(BaseModel):
+    """Result view of a completed Assessment for instructor pages; only the score leaves the results"""
+    id: PydanticObjectId = Field(alias="_id")
+    user_id: str
+    title: str
+    assessment_type: AssessmentType
+    subject: str
+    end_time: Optional[datetime] = None
+    time_spent: float = 0.0
+    score: Optional[float] = None
+
+    class Settings:
+        projection = {
+            "user_id": 1,
+            "title": 1,
+            "assessment_type": 1,
+            "subject": 1,
+            "end_time": 1,
+            "time_spent": 1,
+            "score": "$results.score"
+        }
@@ -8,6 +8,8 @@ from pydantic import BaseModel, Field
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 from enum import Enum
+import numpy as np
+from pymongo import ASCENDING, IndexModel
 
 class Difficulty(str, Enum):
     EASY = "easy"
@@ -97,7 +99,11 @@ class Question(Document):
     class Settings:
         name = "questions"
         indexes = [
-            "subject",
+            # Admin question list filters; also serves plain subject lookups
+            IndexModel(
+                [("subject", ASCENDING), ("difficulty", ASCENDING), ("is_active", ASCENDING)],
+                name="subject_difficulty_active"
+            ),
             "topic",
             "difficulty",
             "difficulty_score",
@@ -119,7 +125,7 @@ class Question(Document):
         # Effectiveness formula: balances accuracy, discrimination, and appropriate difficulty
         return (accuracy * 0.4 + discrimination * 0.4 + (1 - abs(difficulty - 0.5)) * 0.2) * 100
 
-    def update_usage_stats(self, is_correct: bool, time_spent: float):
+    def update_usage_stats(self, is_correct: bool, time_spent: float, now: Optional[datetime] = None):
         """Update usage statistics"""
         self.usage_stats.times_used += 1
         if is_correct:
@@ -129,29 +135,35 @@ class Question(Document):
         total_time = self.usage_stats.average_time_spent * (self.usage_stats.times_used - 1) + time_spent
         self.usage_stats.average_time_spent = total_time / self.usage_stats.times_used
         
-        self.usage_stats.last_used = datetime.now()
+        self.usage_stats.last_used = now or datetime.now()
 
     def update_psychometrics(self, responses: List[Dict[str, Any]]):
         """Update psychometric properties"""
         if not responses:
             return
         
-        correct_responses = sum(1 for r in responses if r.get('is_correct', False))
-        total_responses = len(responses)
+        is_correct = np.fromiter((bool(r.get('is_correct', False)) for r in responses), dtype=bool, count=len(responses))
+        user_ability = np.fromiter((r.get('user_ability', 0) for r in responses), dtype=np.float64, count=len(responses))
+        self.update_psychometrics_vec(is_correct, user_ability)
+
+    def update_psychometrics_vec(self, is_correct: np.ndarray, user_ability: np.ndarray):
+        """Update psychometric properties from response columns (one entry per response)"""
+        total_responses = len(is_correct)
+        if total_responses == 0:
+            return
         
         # Update difficulty (proportion of correct responses)
-        self.psychometrics.difficulty = correct_responses / total_responses
+        self.psychometrics.difficulty = float(is_correct.mean())
         
         # Calculate discrimination (difference between high and low performers)
-        sorted_responses = sorted(responses, key=lambda x: x.get('user_ability', 0), reverse=True)
-        top_third = (len(sorted_responses) + 2) // 3  # Ceiling division
-        bottom_third = len(sorted_responses) // 3  # Floor division
-        
-        top_correct = sum(1 for r in sorted_responses[:top_third] if r.get('is_correct', False))
-        bottom_correct = sum(1 for r in sorted_responses[-bottom_third:] if r.get('is_correct', False))
+        top_third = (total_responses + 2) // 3  # Ceiling division
+        bottom_third = total_responses // 3  # Floor division
         
         if top_third > 0 and bottom_third > 0:
-            self.psychometrics.discrimination = (top_correct / top_third) - (bottom_correct / bottom_third)
+            # Partial selection of the highest/lowest abilities instead of a full sort
+            top = np.argpartition(user_ability, total_responses - top_third)[total_responses - top_third:]
+            bottom = np.argpartition(user_ability, bottom_third - 1)[:bottom_third]
+            self.psychometrics.discrimination = float(is_correct[top].mean() - is_correct[bottom].mean())
 
     def get_adaptive_difficulty(self) -> float:
         """Get question difficulty score for adaptive algorithm"""
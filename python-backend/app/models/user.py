@@ -3,12 +3,31 @@ User model for Python backend
 Equivalent to Node.js User model
 """
 
-from beanie import Document, Indexed
+from beanie import Document, Indexed, Insert, PydanticObjectId, Replace, Save, SaveChanges, before_event
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Dict, List, Any
+from typing import TYPE_CHECKING, Optional, Dict, List, Any
 from datetime import datetime
 from enum import Enum
+import os
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+
+if TYPE_CHECKING:
+    from app.models.aptitude_attempt import AptitudeAttempt
+
+# bcrypt releases the GIL while hashing, so a dedicated pool sized to the CPUs hashes in
+# parallel without tying up the default executor other to_thread work shares
+_bcrypt_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
+
+async def run_bcrypt(func, *args):
+    """Run a bcrypt call on the dedicated hashing pool"""
+    return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, func, *args)
+
+def _search_name(first_name: str, last_name: str) -> str:
+    """Lowercased "first last" stored for indexed name search"""
+    return f"{first_name} {last_name}".lower()
 
 class UserRole(str, Enum):
     STUDENT = "student"
@@ -30,7 +49,6 @@ class StudentProfile(BaseModel):
     academic_level: AcademicLevel = AcademicLevel.UNDERGRADUATE
     specialization: Optional[str] = None
     gpa: Optional[float] = Field(None, ge=0, le=10)
-    previous_assessments: List[str] = []  # Assessment IDs
     skill_level: Dict[str, float] = {}  # Skill areas to proficiency levels (0-100)
     learning_style: Optional[LearningStyle] = None
 
@@ -58,16 +76,6 @@ class CurrentAptitudeTest(BaseModel):
     status: Optional[str] = None
     time_spent: Optional[float] = None
 
-class AptitudeHistory(BaseModel):
-    test_id: str
-    test_title: str
-    test_type: str
-    score: float
-    passed: bool
-    completed_at: datetime
-    time_spent: float
-    answers: List[AptitudeAnswer]
-
 class User(Document):
     email: Indexed(EmailStr, unique=True)
     password: str = Field(..., min_length=6)
@@ -98,7 +106,10 @@ class User(Document):
     # Aptitude test fields
     aptitude_attempts: Dict[str, int] = {}  # testId to attempt count
     current_aptitude_test: Optional[CurrentAptitudeTest] = None
-    aptitude_history: List[AptitudeHistory] = []
+    # Completed attempts live in the aptitude_attempts collection, see get_aptitude_history()
+    
+    # Lowercased "first last", kept in sync on save for indexed name search
+    full_name_search: str = ""
     
     class Settings:
         name = "users"
@@ -106,9 +117,35 @@ class User(Document):
             "email",
             "roll_number",
             "institution",
-            "role"
+            "role",
+            IndexModel([("full_name_search", ASCENDING)], name="full_name_search"),
+            # Active students by instructor and by batch (assignment views)
+            IndexModel(
+                [("assigned_instructor", ASCENDING), ("role", ASCENDING), ("is_active", ASCENDING)],
+                name="instructor_role_active"
+            ),
+            IndexModel(
+                [("batch", ASCENDING), ("role", ASCENDING), ("is_active", ASCENDING)],
+                name="batch_role_active"
+            )
         ]
 
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def sync_full_name_search(self):
+        """Refresh the denormalized search name before writing"""
+        self.full_name_search = _search_name(self.first_name, self.last_name)
+
+    def set(self, expression: Dict[Any, Any], **kwargs):
+        """Beanie set(); changing a name also sets full_name_search, which the
+        before-write hook cannot do for a partial update"""
+        names = {str(key): value for key, value in expression.items()}
+        if "first_name" in names or "last_name" in names:
+            expression = {**expression, "full_name_search": _search_name(
+                names.get("first_name", self.first_name),
+                names.get("last_name", self.last_name)
+            )}
+        return super().set(expression, **kwargs)
+
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
         salt = bcrypt.gensalt(rounds=12)
@@ -116,11 +153,19 @@ class User(Document):
 
     async def set_password(self, password: str):
         """Set hashed password"""
-        self.password = self.hash_password(password)
+        # bcrypt is CPU-bound, so keep it off the event loop
+        self.password = await run_bcrypt(self.hash_password, password)
 
     async def check_password(self, password: str) -> bool:
         """Check password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password.encode('utf-8'))
+        return await run_bcrypt(bcrypt.checkpw, password.encode('utf-8'), self.password.encode('utf-8'))
+
+    async def get_aptitude_history(self) -> List["AptitudeAttempt"]:
+        """Get user's completed aptitude tests, newest first"""
+        from app.models.aptitude_attempt import AptitudeAttempt
+        return await AptitudeAttempt.find(
+            AptitudeAttempt.user_id == str(self.id)
+        ).sort(-AptitudeAttempt.completed_at).to_list()
 
     def get_skill_level(self, skill_area: str) -> float:
         """Get user's current skill level for a specific area"""
@@ -163,3 +208,41 @@ class User(Document):
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+
+class StudentSummary(BaseModel):
+    """Roster view of a student User for instructor pages; leaves out credentials and profiles"""
+    id: PydanticObjectId = Field(alias="_id")
+    first_name: str
+    last_name: str
+    email: str
+    department: Optional[str] = None
+    year: Optional[str] = None
+    roll_number: Optional[str] = None
+    batch: str = ""
+    section: str = ""
+    performance_metrics: PerformanceMetrics = PerformanceMetrics()
+
+    class Settings:
+        projection = {
+            "first_name": 1,
+            "last_name": 1,
+            "email": 1,
+            "department": 1,
+            "year": 1,
+            "roll_number": 1,
+            "batch": 1,
+            "section": 1,
+            "performance_metrics": 1
+        }
+
+class UserAnalyticsSummary(BaseModel):
+    """Analytics view of a User; only the performance and profile sections"""
+    id: PydanticObjectId = Field(alias="_id")
+    performance_metrics: PerformanceMetrics = PerformanceMetrics()
+    student_profile: Optional[StudentProfile] = None
+
+    class Settings:
+        projection = {
+            "performance_metrics": 1,
+            "student_profile": 1
+        }
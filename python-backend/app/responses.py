@@ -0,0 +1,21 @@
+"""
+Response classes for Python backend
+"""
+
+from typing import Any
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson doesn't handle natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
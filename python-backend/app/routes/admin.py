@@ -3,16 +3,94 @@ Admin routes for Python backend
 Equivalent to Node.js admin routes
 """
 
+import re
+import time
+import asyncio
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, List, Any
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from beanie import PydanticObjectId
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user, invalidate_cached_user
 from app.models.user import User, UserRole
 from app.models.assessment import Assessment, AssessmentStatus
 from app.models.question import Question
 
 router = APIRouter()
 
+# Dashboard figures are cached briefly since the admin UI polls them
+DASHBOARD_CACHE_TTL = 15  # seconds
+_dashboard_cache: Dict[str, Any] = {"at": float("-inf"), "value": None}
+_dashboard_lock = asyncio.Lock()
+
+# Lean row models for the admin listings; $project fetches only these fields
+class UserListItem(BaseModel):
+    id: PydanticObjectId = Field(validation_alias="_id")
+    email: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: Optional[str] = None
+    institution: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+
+class AssessmentListItem(BaseModel):
+    id: PydanticObjectId = Field(validation_alias="_id")
+    user_id: Optional[str] = None
+    title: Optional[str] = None
+    assessment_type: Optional[str] = None
+    subject: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    score: Optional[float] = None
+
+class QuestionListItem(BaseModel):
+    id: PydanticObjectId = Field(validation_alias="_id")
+    question_text: Optional[str] = None
+    subject: Optional[str] = None
+    topic: Optional[str] = None
+    difficulty: Optional[str] = None
+    difficulty_score: Optional[float] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    usage_stats: Optional[Dict[str, Any]] = None
+
+USER_LIST_PROJECTION = {name: 1 for name in UserListItem.model_fields if name != "id"}
+ASSESSMENT_LIST_PROJECTION = {
+    "user_id": 1,
+    "title": 1,
+    "assessment_type": 1,
+    "subject": 1,
+    "status": 1,
+    "created_at": 1,
+    "completed_at": "$end_time",
+    "score": "$results.score"
+}
+QUESTION_LIST_PROJECTION = {name: 1 for name in QuestionListItem.model_fields if name != "id"}
+
+# Dashboard filters and count pipelines that never change, built once at import
+COUNT_STAGE = {"$count": "n"}
+ACTIVE_FILTER = {"is_active": True}
+COMPLETED_ASSESSMENT_FILTER = {"status": AssessmentStatus.COMPLETED.value}
+ROLE_VALUES = tuple(role.value for role in UserRole)
+USER_COUNT_FACETS = {
+    "total": [COUNT_STAGE],
+    "active": [{"$match": ACTIVE_FILTER}, COUNT_STAGE],
+    "by_role": [{"$group": {"_id": "$role", "n": {"$sum": 1}}}]
+}
+ASSESSMENT_COUNT_FACETS = {
+    "total": [COUNT_STAGE],
+    "completed": [{"$match": COMPLETED_ASSESSMENT_FILTER}, COUNT_STAGE]
+}
+QUESTION_COUNT_FACETS = {
+    "total": [COUNT_STAGE],
+    "active": [{"$match": ACTIVE_FILTER}, COUNT_STAGE]
+}
+
 def require_admin(current_user: User = Depends(get_current_user)):
     """Require admin role"""
     if current_user.role != UserRole.ADMIN:
@@ -22,57 +100,125 @@ def require_admin(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+async def _run_facets(model, facets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Run several pipelines over a collection in one $facet round trip"""
+    result = await model.get_motor_collection().aggregate([{"$facet": facets}]).to_list(length=1)
+    return result[0]
+
+def _facet_count(rows: List[Dict[str, Any]]) -> int:
+    """Unwrap the result of a $count facet"""
+    return rows[0]["n"] if rows else 0
+
+async def _paginate(model, query: Dict[str, Any], projection: Dict[str, Any], skip: int, limit: int):
+    """Fetch one page of projected documents and the total match count in one round trip"""
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "data": [{"$skip": skip}, {"$limit": limit}, {"$project": projection}],
+            "total": [{"$count": "n"}]
+        }}
+    ]
+    result = await model.get_motor_collection().aggregate(pipeline).to_list(length=1)
+    page = result[0]
+    total = page["total"][0]["n"] if page["total"] else 0
+    return page["data"], total
+
+async def _stream_rows(model, row_model, query: Dict[str, Any], projection: Dict[str, Any], skip: int, limit: int):
+    """Yield one page of projected documents as NDJSON lines straight off the cursor"""
+    pipeline = [{"$match": query}, {"$skip": skip}, {"$limit": limit}, {"$project": projection}]
+    async for doc in model.get_motor_collection().aggregate(pipeline):
+        yield orjson.dumps(row_model.model_validate(doc).model_dump(), default=str) + b"\n"
+
+def _ndjson_response(model, row_model, query: Dict[str, Any], projection: Dict[str, Any], skip: int, limit: int) -> StreamingResponse:
+    """Stream a listing page as NDJSON (one row per line, no pagination envelope)"""
+    return StreamingResponse(
+        _stream_rows(model, row_model, query, projection, skip, limit),
+        media_type="application/x-ndjson"
+    )
+
+async def _build_dashboard() -> Dict[str, Any]:
+    """Compute the system overview figures"""
+    now = datetime.now()
+    last_30_days = now - timedelta(days=30)
+    last_7_days = now - timedelta(days=7)
+
+    # One $facet aggregation per collection instead of a count query per figure;
+    # only the date-bounded counts need building per call
+    user_facets = {
+        **USER_COUNT_FACETS,
+        "new_30_days": [{"$match": {"created_at": {"$gte": last_30_days}}}, COUNT_STAGE],
+        "new_7_days": [{"$match": {"created_at": {"$gte": last_7_days}}}, COUNT_STAGE]
+    }
+    assessment_facets = {
+        **ASSESSMENT_COUNT_FACETS,
+        "last_30_days": [{"$match": {"created_at": {"$gte": last_30_days}}}, COUNT_STAGE]
+    }
+
+    # The three aggregations are independent, so run them concurrently
+    user_stats, assessment_stats, question_stats = await asyncio.gather(
+        _run_facets(User, user_facets),
+        _run_facets(Assessment, assessment_facets),
+        _run_facets(Question, QUESTION_COUNT_FACETS)
+    )
+
+    # User statistics
+    total_users = _facet_count(user_stats["total"])
+    active_users = _facet_count(user_stats["active"])
+    new_users_30_days = _facet_count(user_stats["new_30_days"])
+    new_users_7_days = _facet_count(user_stats["new_7_days"])
+
+    # Users by role, reporting roles without users as 0
+    users_by_role = dict.fromkeys(ROLE_VALUES, 0)
+    users_by_role.update({row["_id"]: row["n"] for row in user_stats["by_role"]})
+
+    # Assessment statistics
+    total_assessments = _facet_count(assessment_stats["total"])
+    completed_assessments = _facet_count(assessment_stats["completed"])
+    assessments_30_days = _facet_count(assessment_stats["last_30_days"])
+
+    # Question statistics
+    total_questions = _facet_count(question_stats["total"])
+    active_questions = _facet_count(question_stats["active"])
+
+    return {
+        "users": {
+            "total": total_users,
+            "active": active_users,
+            "new_30_days": new_users_30_days,
+            "new_7_days": new_users_7_days,
+            "by_role": users_by_role
+        },
+        "assessments": {
+            "total": total_assessments,
+            "completed": completed_assessments,
+            "last_30_days": assessments_30_days
+        },
+        "questions": {
+            "total": total_questions,
+            "active": active_questions
+        },
+        "system": {
+            "status": "healthy",
+            "last_updated": now.isoformat()
+        }
+    }
+
 @router.get("/dashboard")
 async def get_admin_dashboard(admin_user: User = Depends(require_admin)):
     """Get system overview dashboard"""
     try:
-        now = datetime.now()
-        last_30_days = now - timedelta(days=30)
-        last_7_days = now - timedelta(days=7)
-
-        # User statistics
-        total_users = await User.count()
-        active_users = await User.find(User.is_active == True).count()
-        new_users_30_days = await User.find(User.created_at >= last_30_days).count()
-        new_users_7_days = await User.find(User.created_at >= last_7_days).count()
-
-        # Users by role
-        users_by_role = {}
-        for role in UserRole:
-            count = await User.find(User.role == role).count()
-            users_by_role[role.value] = count
-
-        # Assessment statistics
-        total_assessments = await Assessment.count()
-        completed_assessments = await Assessment.find(Assessment.status == AssessmentStatus.COMPLETED).count()
-        assessments_30_days = await Assessment.find(Assessment.created_at >= last_30_days).count()
-
-        # Question statistics
-        total_questions = await Question.count()
-        active_questions = await Question.find(Question.is_active == True).count()
+        if time.monotonic() - _dashboard_cache["at"] < DASHBOARD_CACHE_TTL:
+            return _dashboard_cache["value"]
 
-        return {
-            "users": {
-                "total": total_users,
-                "active": active_users,
-                "new_30_days": new_users_30_days,
-                "new_7_days": new_users_7_days,
-                "by_role": users_by_role
-            },
-            "assessments": {
-                "total": total_assessments,
-                "completed": completed_assessments,
-                "last_30_days": assessments_30_days
-            },
-            "questions": {
-                "total": total_questions,
-                "active": active_questions
-            },
-            "system": {
-                "status": "healthy",
-                "last_updated": now.isoformat()
-            }
-        }
+        async with _dashboard_lock:
+            # Another request may have refreshed the cache while we waited
+            if time.monotonic() - _dashboard_cache["at"] < DASHBOARD_CACHE_TTL:
+                return _dashboard_cache["value"]
+
+            dashboard = await _build_dashboard()
+            _dashboard_cache["value"] = dashboard
+            _dashboard_cache["at"] = time.monotonic()
+            return dashboard
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -84,34 +230,27 @@ async def get_all_users(
     page: int = 1,
     limit: int = 20,
     role: str = None,
+    search: str = None,
+    format: str = "json",
     admin_user: User = Depends(require_admin)
 ):
-    """Get all users with pagination"""
+    """Get all users with pagination; format=ndjson streams the page instead"""
     try:
         query = {}
         if role:
             query["role"] = role
+        if search:
+            # Anchored prefix match so the full_name_search index bounds the scan
+            query["full_name_search"] = {"$regex": "^" + re.escape(search.strip().lower())}
 
         skip = (page - 1) * limit
-        users = await User.find(query).skip(skip).limit(limit).to_list()
-        
-        total = await User.find(query).count()
+        if format == "ndjson":
+            return _ndjson_response(User, UserListItem, query, USER_LIST_PROJECTION, skip, limit)
+
+        users, total = await _paginate(User, query, USER_LIST_PROJECTION, skip, limit)
 
         return {
-            "users": [
-                {
-                    "id": str(user.id),
-                    "email": user.email,
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "role": user.role,
-                    "institution": user.institution,
-                    "is_active": user.is_active,
-                    "created_at": user.created_at,
-                    "last_login": user.last_login
-                }
-                for user in users
-            ],
+            "users": [UserListItem.model_validate(user) for user in users],
             "pagination": {
                 "page": page,
                 "limit": limit,
@@ -133,21 +272,25 @@ async def update_user_status(
 ):
     """Update user active status"""
     try:
-        user = await User.get(user_id)
-        if not user:
+        # Write only the changed field instead of re-saving the whole document
+        result = await User.get_motor_collection().update_one(
+            {"_id": PydanticObjectId(user_id)},
+            {"$set": {"is_active": is_active}}
+        )
+        if result.matched_count == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-
-        user.is_active = is_active
-        await user.save()
+        invalidate_cached_user(user_id)
 
         return {
             "message": f"User {'activated' if is_active else 'deactivated'} successfully",
             "user_id": user_id,
             "is_active": is_active
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -159,34 +302,23 @@ async def get_all_assessments(
     page: int = 1,
     limit: int = 20,
     status: str = None,
+    format: str = "json",
     admin_user: User = Depends(require_admin)
 ):
-    """Get all assessments with pagination"""
+    """Get all assessments with pagination; format=ndjson streams the page instead"""
     try:
         query = {}
         if status:
             query["status"] = status
 
         skip = (page - 1) * limit
-        assessments = await Assessment.find(query).skip(skip).limit(limit).to_list()
-        
-        total = await Assessment.find(query).count()
+        if format == "ndjson":
+            return _ndjson_response(Assessment, AssessmentListItem, query, ASSESSMENT_LIST_PROJECTION, skip, limit)
+
+        assessments, total = await _paginate(Assessment, query, ASSESSMENT_LIST_PROJECTION, skip, limit)
 
         return {
-            "assessments": [
-                {
-                    "id": str(assessment.id),
-                    "user_id": assessment.user_id,
-                    "title": assessment.title,
-                    "assessment_type": assessment.assessment_type,
-                    "subject": assessment.subject,
-                    "status": assessment.status,
-                    "created_at": assessment.created_at,
-                    "completed_at": assessment.end_time,
-                    "score": assessment.results.score if assessment.results else None
-                }
-                for assessment in assessments
-            ],
+            "assessments": [AssessmentListItem.model_validate(assessment) for assessment in assessments],
             "pagination": {
                 "page": page,
                 "limit": limit,
@@ -206,9 +338,10 @@ async def get_all_questions(
     limit: int = 20,
     subject: str = None,
     difficulty: str = None,
+    format: str = "json",
     admin_user: User = Depends(require_admin)
 ):
-    """Get all questions with pagination"""
+    """Get all questions with pagination; format=ndjson streams the page instead"""
     try:
         query = {}
         if subject:
@@ -217,25 +350,13 @@ async def get_all_questions(
             query["difficulty"] = difficulty
 
         skip = (page - 1) * limit
-        questions = await Question.find(query).skip(skip).limit(limit).to_list()
-        
-        total = await Question.find(query).count()
+        if format == "ndjson":
+            return _ndjson_response(Question, QuestionListItem, query, QUESTION_LIST_PROJECTION, skip, limit)
+
+        questions, total = await _paginate(Question, query, QUESTION_LIST_PROJECTION, skip, limit)
 
         return {
-            "questions": [
-                {
-                    "id": str(question.id),
-                    "question_text": question.question_text,
-                    "subject": question.subject,
-                    "topic": question.topic,
-                    "difficulty": question.difficulty,
-                    "difficulty_score": question.difficulty_score,
-                    "is_active": question.is_active,
-                    "created_at": question.created_at,
-                    "usage_stats": question.usage_stats.dict() if question.usage_stats else None
-                }
-                for question in questions
-            ],
+            "questions": [QuestionListItem.model_validate(question) for question in questions],
             "pagination": {
                 "page": page,
                 "limit": limit,
@@ -2,17 +2,77 @@
 Analytics routes for Python backend
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
+import numpy as np
+from app.database import get_analytics_database
 from app.routes.auth import get_current_user
+from app.routes.admin import require_admin
 from app.models.user import User
+from app.models.aptitude_test import AptitudeTest
+from app.utils.aptitude_stats import effectiveness_batch
 
 router = APIRouter()
 
+def _per_attempt(total_field: str, legacy_field: str) -> dict:
+    """Aggregation expression dividing a usage_stats running total by the attempt count"""
+    return {"$cond": [
+        {"$gt": ["$attempts", 0]},
+        {"$ifNull": [
+            {"$divide": [f"$usage_stats.{total_field}", "$attempts"]},
+            {"$ifNull": [f"$usage_stats.{legacy_field}", 0.0]}
+        ]},
+        0.0
+    ]}
+
 @router.get("/performance")
 async def get_user_performance(current_user: User = Depends(get_current_user)):
     """Get user performance analytics"""
     return {
         "message": "Analytics endpoint - Python backend",
         "user_id": str(current_user.id),
-        "performance_metrics": current_user.performance_metrics.dict()
+        "performance_metrics": current_user.performance_metrics.model_dump()
     }
+
+@router.get("/aptitude-effectiveness")
+async def get_aptitude_effectiveness(admin_user: User = Depends(require_admin)):
+    """Get effectiveness for every aptitude test"""
+    try:
+        collection = get_analytics_database()[AptitudeTest.get_settings().name]
+        pipeline = [
+            {"$project": {
+                "title": 1,
+                "attempts": {"$ifNull": ["$usage_stats.total_attempts", 0]},
+                "usage_stats": 1
+            }},
+            # Averages come from the running totals; documents stored before the
+            # totals existed fall back to their stored averages
+            {"$project": {
+                "title": 1,
+                "attempts": 1,
+                "average_score": _per_attempt("total_score_sum", "average_score"),
+                "completion_rate": _per_attempt("total_completed_count", "completion_rate")
+            }}
+        ]
+        docs = await collection.aggregate(pipeline).to_list(length=None)
+        
+        attempts = np.fromiter((d["attempts"] for d in docs), dtype=np.int64, count=len(docs))
+        average_score = np.fromiter((d["average_score"] for d in docs), dtype=np.float64, count=len(docs))
+        completion_rate = np.fromiter((d["completion_rate"] for d in docs), dtype=np.float64, count=len(docs))
+        effectiveness = effectiveness_batch(completion_rate, average_score, attempts)
+        
+        return {
+            "tests": [
+                {
+                    "id": str(doc["_id"]),
+                    "title": doc.get("title"),
+                    "totalAttempts": int(doc["attempts"]),
+                    "effectiveness": float(value)
+                }
+                for doc, value in zip(docs, effectiveness)
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching aptitude effectiveness: {str(e)}"
+        )
@@ -2,15 +2,25 @@
 Aptitude test routes for Python backend
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.routes.auth import get_current_user
-from app.models.user import User
-from app.models.aptitude_test import AptitudeTest
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from app.routes.auth import get_current_user, invalidate_cached_user
+from app.models.user import User, AptitudeAnswer
+from app.models.aptitude_attempt import AptitudeAttempt
+from app.models.aptitude_test import AptitudeTest, AptitudeTestSummary, AptitudeQuestion
+from app.responses import ORJSONResponse
+from app.logger import get_logger
+from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
+import orjson
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Encoded test listing keyed by its ETag; holds only the current version, so admin
+# edits invalidate it through AptitudeTest.active_version() without explicit busting
+_listing_cache: Dict[str, bytes] = {}
 
 class AptitudeTestResponse(BaseModel):
     id: str
@@ -22,28 +32,62 @@ class AptitudeTestResponse(BaseModel):
     passing_score: float
     is_available: bool
 
+def _client_question(number: int, q: AptitudeQuestion) -> Dict[str, Any]:
+    """A question as sent to the test taker, without answers"""
+    return {
+        "id": f"q_{number}",
+        "questionText": q.question_text,
+        "options": [{"text": opt.text} for opt in q.options],
+        "category": q.category,  # str enums, encoded natively by orjson
+        "difficulty": q.difficulty,
+        "estimatedTime": q.estimated_time
+    }
+
+async def _stream_test(test_data: Dict[str, Any], questions: List[AptitudeQuestion]):
+    """Yield {"test": {...}} with the questions encoded one at a time after the header fields"""
+    yield b'{"test":' + orjson.dumps(test_data)[:-1] + b',"questions":['
+    for i, q in enumerate(questions, 1):
+        yield (b"," if i > 1 else b"") + orjson.dumps(_client_question(i, q))
+    yield b"]}}"
+
+def _test_response(test_data: Dict[str, Any], questions: List[AptitudeQuestion]) -> StreamingResponse:
+    """Stream a test payload so large tests never exist as one encoded buffer"""
+    return StreamingResponse(_stream_test(test_data, questions), media_type="application/json")
+
 @router.get("")
 @router.get("/")
-async def get_aptitude_tests(current_user: User = Depends(get_current_user)):
+async def get_aptitude_tests(request: Request, current_user: User = Depends(get_current_user)):
     """Get available aptitude tests"""
     try:
-        print(f"Getting aptitude tests for user: {current_user.id}")
+        logger.debug("Getting aptitude tests for user: %s", current_user.id)
+        
+        # The listing is the same for every user; skip the query when the client copy is current
+        etag = f'"{await AptitudeTest.active_version()}"'
+        if etag in request.headers.get("if-none-match", "").split(", "):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        cached = _listing_cache.get(etag)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json", headers={"ETag": etag})
         
         # Get all available aptitude tests
-        tests = await AptitudeTest.find(AptitudeTest.is_active == True).to_list()
+        # Project onto the summary view so question arrays never leave the database
+        tests = await AptitudeTest.find(AptitudeTest.is_active == True).aggregate(
+            [], projection_model=AptitudeTestSummary
+        ).to_list()
         
-        print(f"Found {len(tests)} aptitude tests")
+        logger.debug("Found %d aptitude tests", len(tests))
         
         test_list = []
         for test in tests:
-            print(f"Processing test: {test.title}")
+            logger.debug("Processing test: %s", test.title)
             test_data = {
                 "_id": str(test.id),  # Frontend expects _id
                 "title": test.title,
                 "description": test.description,
                 "type": test.type,  # Frontend expects type, not test_type
                 "config": {
-                    "totalQuestions": len(test.questions),  # Frontend expects config.totalQuestions
+                    "totalQuestions": test.questions_count,  # Frontend expects config.totalQuestions
                     "timeLimit": test.config.time_limit,  # Frontend expects config.timeLimit in seconds
                     "passingScore": test.config.passing_score,
                     "maxAttempts": test.config.max_attempts
@@ -56,11 +100,14 @@ async def get_aptitude_tests(current_user: User = Depends(get_current_user)):
             }
             test_list.append(test_data)
         
-        print(f"Returning {len(test_list)} tests")
+        logger.debug("Returning %d tests", len(test_list))
         
-        return test_list  # Return the array directly, not wrapped in an object
+        response = ORJSONResponse(test_list, headers={"ETag": etag})  # Return the array directly, not wrapped in an object
+        _listing_cache.clear()
+        _listing_cache[etag] = response.body
+        return response
     except Exception as e:
-        print(f"Error fetching aptitude tests: {e}")
+        logger.error("❌ Error fetching aptitude tests: %s", e)
         return []  # Return empty array on error
 
 @router.get("/history")
@@ -69,35 +116,27 @@ async def get_aptitude_history(
 ):
     """Get user's aptitude test history"""
     try:
-        if not current_user.aptitude_history:
-            return []
+        # History comes back sorted by completion date (newest first)
+        history = await current_user.get_aptitude_history()
         
-        # Return history sorted by completion date (newest first)
-        history = sorted(
-            current_user.aptitude_history,
-            key=lambda x: x.completed_at,
-            reverse=True
-        )
-        
-        # Convert to frontend-friendly format
-        history_data = []
-        for entry in history:
-            history_data.append({
+        # Convert to frontend-friendly format; orjson writes completedAt as ISO 8601
+        return ORJSONResponse([
+            {
                 "testId": entry.test_id,
                 "testTitle": entry.test_title,
                 "testType": entry.test_type,
                 "score": entry.score,
                 "passed": entry.passed,
-                "completedAt": entry.completed_at.isoformat(),
+                "completedAt": entry.completed_at,
                 "timeSpent": entry.time_spent,
                 "totalQuestions": len(entry.answers),
-                "correctAnswers": len([a for a in entry.answers if a.answer == 0])  # Mock: assume answer 0 is correct
-            })
-        
-        return history_data
+                "correctAnswers": sum(1 for a in entry.answers if a.answer == 0)  # Mock: assume answer 0 is correct
+            }
+            for entry in history
+        ])
         
     except Exception as e:
-        print(f"Error fetching aptitude history: {e}")
+        logger.error("❌ Error fetching aptitude history: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch aptitude history: {str(e)}"
@@ -133,43 +172,30 @@ async def get_aptitude_test(
                 detail=f"Maximum attempts ({max_attempts}) reached for this test"
             )
         
-        return {
-            "test": {
-                "_id": str(test.id),  # Frontend expects _id
-                "title": test.title,
-                "description": test.description,
-                "type": test.type,  # Frontend expects type
-                "config": {
-                    "totalQuestions": len(test.questions),
-                    "timeLimit": test.config.time_limit,  # In seconds
-                    "passingScore": test.config.passing_score,
-                    "maxAttempts": test.config.max_attempts
-                },
-                "usageStats": {
-                    "totalAttempts": test.usage_stats.total_attempts,
-                    "averageScore": test.usage_stats.average_score,
-                    "completionRate": test.usage_stats.completion_rate
-                },
-                "questions": [
-                    {
-                        "id": f"q_{i+1}",
-                        "questionText": q.question_text,
-                        "options": [
-                            {"text": opt.text} for opt in q.options
-                        ],
-                        "category": q.category.value if hasattr(q.category, 'value') else str(q.category),
-                        "difficulty": q.difficulty.value if hasattr(q.difficulty, 'value') else str(q.difficulty),
-                        "estimatedTime": q.estimated_time
-                    } for i, q in enumerate(test.questions)
-                ],
-                "attempts_remaining": max_attempts - attempts,
-                "user_attempts": attempts
-            }
-        }
+        questions = test.questions
+        return _test_response({
+            "_id": str(test.id),  # Frontend expects _id
+            "title": test.title,
+            "description": test.description,
+            "type": test.type,  # Frontend expects type
+            "config": {
+                "totalQuestions": len(questions),
+                "timeLimit": test.config.time_limit,  # In seconds
+                "passingScore": test.config.passing_score,
+                "maxAttempts": test.config.max_attempts
+            },
+            "usageStats": {
+                "totalAttempts": test.usage_stats.total_attempts,
+                "averageScore": test.usage_stats.average_score,
+                "completionRate": test.usage_stats.completion_rate
+            },
+            "attempts_remaining": max_attempts - attempts,
+            "user_attempts": attempts
+        }, questions)
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error fetching aptitude test {test_id}: {e}")
+        logger.error("❌ Error fetching aptitude test %s: %s", test_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch aptitude test"
@@ -208,43 +234,30 @@ async def start_aptitude_test(
             )
         
         # Return test data for starting
-        return {
-            "test": {
-                "_id": str(test.id),
-                "title": test.title,
-                "description": test.description,
-                "type": test.type,
-                "config": {
-                    "totalQuestions": len(test.questions),
-                    "timeLimit": test.config.time_limit,
-                    "passingScore": test.config.passing_score,
-                    "maxAttempts": test.config.max_attempts
-                },
-                "usageStats": {
-                    "totalAttempts": test.usage_stats.total_attempts,
-                    "averageScore": test.usage_stats.average_score,
-                    "completionRate": test.usage_stats.completion_rate
-                },
-                "questions": [
-                    {
-                        "id": f"q_{i+1}",
-                        "questionText": q.question_text,
-                        "options": [
-                            {"text": opt.text} for opt in q.options
-                        ],
-                        "category": q.category.value if hasattr(q.category, 'value') else str(q.category),
-                        "difficulty": q.difficulty.value if hasattr(q.difficulty, 'value') else str(q.difficulty),
-                        "estimatedTime": q.estimated_time
-                    } for i, q in enumerate(test.questions)
-                ],
-                "attempts_remaining": max_attempts - attempts,
-                "user_attempts": attempts
-            }
-        }
+        questions = test.questions
+        return _test_response({
+            "_id": str(test.id),
+            "title": test.title,
+            "description": test.description,
+            "type": test.type,
+            "config": {
+                "totalQuestions": len(questions),
+                "timeLimit": test.config.time_limit,
+                "passingScore": test.config.passing_score,
+                "maxAttempts": test.config.max_attempts
+            },
+            "usageStats": {
+                "totalAttempts": test.usage_stats.total_attempts,
+                "averageScore": test.usage_stats.average_score,
+                "completionRate": test.usage_stats.completion_rate
+            },
+            "attempts_remaining": max_attempts - attempts,
+            "user_attempts": attempts
+        }, questions)
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error starting aptitude test {test_id}: {e}")
+        logger.error("❌ Error starting aptitude test %s: %s", test_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start aptitude test: {str(e)}"
@@ -282,7 +295,7 @@ async def submit_answer(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error submitting answer for test {test_id}: {e}")
+        logger.error("❌ Error submitting answer for test %s: %s", test_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to submit answer: {str(e)}"
@@ -311,45 +324,42 @@ async def complete_aptitude_test(
         passing_score = test.config.passing_score or 60.0
         time_spent = 1200  # Mock time in seconds
         
-        # Save to user's aptitude history
-        from app.models.user import AptitudeHistory, AptitudeAnswer
-        from datetime import datetime
-        
-        # Create mock answers for history
-        mock_answers = []
-        for i, question in enumerate(test.questions):
-            answer = AptitudeAnswer(
+        # Create mock answers for history; the values are built here, so skip validation
+        now = datetime.now()
+        time_per_question = time_spent / total_questions
+        mock_answers = [
+            AptitudeAnswer.model_construct(
                 question_id=f"q_{i+1}",
                 answer=0 if i < correct_answers else 1,  # Mock correct/incorrect answers
-                time_spent=time_spent / total_questions,
-                timestamp=datetime.now()
+                time_spent=time_per_question,
+                timestamp=now
             )
-            mock_answers.append(answer)
+            for i in range(total_questions)
+        ]
         
         # Create history entry
-        history_entry = AptitudeHistory(
+        test_type = test.type.value
+        history_entry = AptitudeAttempt(
+            user_id=str(current_user.id),
             test_id=str(test.id),
             test_title=test.title,
-            test_type=test.type.value if hasattr(test.type, 'value') else str(test.type),
+            test_type=test_type,
             score=score_percentage,
             passed=score_percentage >= passing_score,
-            completed_at=datetime.now(),
+            completed_at=now,
             time_spent=time_spent,
             answers=mock_answers
         )
         
         # Add to user's aptitude history
-        if not current_user.aptitude_history:
-            current_user.aptitude_history = []
-        current_user.aptitude_history.append(history_entry)
+        await history_entry.insert()
         
-        # Update attempt count
-        if not current_user.aptitude_attempts:
-            current_user.aptitude_attempts = {}
-        current_user.aptitude_attempts[str(test.id)] = current_user.aptitude_attempts.get(str(test.id), 0) + 1
-        
-        # Save user
-        await current_user.save()
+        # Increment the attempt count in place instead of re-saving the whole user
+        await User.get_motor_collection().update_one(
+            {"_id": current_user.id},
+            {"$inc": {f"aptitude_attempts.{test.id}": 1}}
+        )
+        invalidate_cached_user(str(current_user.id))
         
         results = {
             "score": score_percentage,
@@ -357,7 +367,7 @@ async def complete_aptitude_test(
             "correctAnswers": correct_answers,
             "timeTaken": time_spent,
             "passed": score_percentage >= passing_score,
-            "testType": test.type.value if hasattr(test.type, 'value') else str(test.type)
+            "testType": test_type
         }
         
         return {
@@ -365,14 +375,14 @@ async def complete_aptitude_test(
             "test": {
                 "_id": str(test.id),
                 "title": test.title,
-                "type": test.type.value if hasattr(test.type, 'value') else str(test.type)
+                "type": test_type
             }
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error completing aptitude test {test_id}: {e}")
+        logger.error("❌ Error completing aptitude test %s: %s", test_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to complete aptitude test: {str(e)}"
@@ -8,15 +8,21 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import random
-from beanie.operators import Or
 
 from app.models.user import User
-from app.models.assessment import Assessment, AssessmentType, AssessmentStatus, AssessmentConfig, AssessmentQuestion
+from app.models.assessment import Assessment, AssessmentType, AssessmentStatus, AssessmentConfig, AssessmentQuestion, AssessmentSummary, CompletionReason, ItemParameters
 from app.models.question import Question, Difficulty
 from app.routes.auth import get_current_user
-from app.ai.gemini_service import GeminiQuestionGenerator
+from app.responses import ORJSONResponse
+from app.logger import get_logger
+from app.utils.ability_math import item_difficulty
+from app.ai.gemini_service import gemini_generator
 
 router = APIRouter()
+logger = get_logger(__name__)
+
+# Statuses of assessments that can still be resumed, as plain values for query filters
+INCOMPLETE_STATUSES = (AssessmentStatus.NOT_STARTED.value, AssessmentStatus.IN_PROGRESS.value)
 
 class CreateAssessmentRequest(BaseModel):
     assessmentType: AssessmentType = Field(alias="assessmentType")
@@ -38,11 +44,7 @@ class AssessmentResponse(BaseModel):
     questions: List[Dict[str, Any]]
     created_at: datetime
 
-class AssessmentListResponse(BaseModel):
-    assessments: List[Dict[str, Any]]
-    incomplete_assessments: List[Dict[str, Any]]
-
-@router.post("/create", response_model=AssessmentResponse)
+@router.post("/create", responses={200: {"model": AssessmentResponse}})
 async def create_assessment(
     request: CreateAssessmentRequest,
     current_user: User = Depends(get_current_user)
@@ -55,24 +57,19 @@ async def create_assessment(
             detail="Only students can create assessments"
         )
     
-    # Check for incomplete assessments and auto-submit stale ones
-    incomplete_assessments = await Assessment.find(
-        Assessment.user_id == str(current_user.id),
-        Or(
-            Assessment.status == AssessmentStatus.NOT_STARTED,
-            Assessment.status == AssessmentStatus.IN_PROGRESS
-        )
-    ).to_list()
-    
-    # Auto-submit assessments that are stale (inactive for >24 hours)
-    stale_cutoff = datetime.now() - timedelta(hours=24)
-    for assessment in incomplete_assessments:
-        if assessment.last_accessed_at < stale_cutoff:
-            await auto_submit_assessment(assessment)
+    # Auto-submit incomplete assessments that are stale (inactive for >24 hours) in one server-side update
+    now = datetime.now()
+    await Assessment.get_motor_collection().update_many(
+        {
+            "user_id": str(current_user.id),
+            "status": {"$in": list(INCOMPLETE_STATUSES)},
+            "last_accessed_at": {"$lt": now - timedelta(hours=24)}
+        },
+        auto_submit_pipeline(now)
+    )
     
-    # Generate questions based on topics
-    gemini_service = GeminiQuestionGenerator()
-    generated_questions = await gemini_service.generate_multiple_questions(
+    # Generate questions based on topics with the shared generator (keeps its client and cache warm)
+    generated_questions = await gemini_generator.generate_multiple_questions(
         subject=request.subject,
         topics=request.topics,
         count=request.config.totalQuestions
@@ -88,8 +85,10 @@ async def create_assessment(
             is_answered=False,
             selected_answer=None,
             is_correct=None,
-            difficulty=q.get('difficulty', Difficulty.MEDIUM),
-            adaptive_reason=f"Generated for {request.subject} - {request.topics[0] if request.topics else 'General'}"
+            difficulty=q.difficulty or Difficulty.MEDIUM,
+            adaptive_reason=f"Generated for {request.subject} - {request.topics[0] if request.topics else 'General'}",
+            # Adaptive selection ranks items by information at the student's ability
+            item_parameters=ItemParameters(difficulty=item_difficulty(q.difficulty_score))
         )
         questions.append(question)
     
@@ -108,41 +107,37 @@ async def create_assessment(
     await assessment.insert()
     
     # Return assessment with questions (without correct answers)
-    questions_for_response = []
-    for i, q in enumerate(generated_questions):
-        question_data = {
+    questions_for_response = [
+        {
             "id": f"q_{i+1}",
             "order": i + 1,
-            "question_text": q.get('question', 'Sample question text'),
-            "options": q.get('options', [
-                {"text": "Option A", "is_correct": False},
-                {"text": "Option B", "is_correct": False},
-                {"text": "Option C", "is_correct": False},
-                {"text": "Option D", "is_correct": False}
-            ]),
-            "difficulty": q.get('difficulty', Difficulty.MEDIUM),
-            "estimated_time": q.get('estimated_time', 60)
+            "question_text": q.question_text,
+            "options": [{"text": option.text} for option in q.options],
+            "difficulty": q.difficulty or Difficulty.MEDIUM,
+            "estimated_time": q.estimated_time
         }
-        questions_for_response.append(question_data)
+        for i, q in enumerate(generated_questions)
+    ]
     
-    return AssessmentResponse(
-        id=str(assessment.id),
-        title=assessment.title,
-        assessment_type=assessment.assessment_type,
-        subject=assessment.subject,
-        topics=assessment.topics,
-        config=assessment.config,
-        status=assessment.status,
-        questions=questions_for_response,
-        created_at=datetime.now()  # Use current time since Assessment doesn't have created_at
-    )
+    # Built from validated models, so skip response-model revalidation and encode directly
+    return ORJSONResponse({
+        "id": str(assessment.id),
+        "title": assessment.title,
+        "assessment_type": assessment.assessment_type,
+        "subject": assessment.subject,
+        "topics": assessment.topics,
+        "config": assessment.config.model_dump(mode="json"),
+        "status": assessment.status,
+        "questions": questions_for_response,
+        "created_at": now  # Use request time since Assessment doesn't have created_at
+    })
 
-@router.get("", response_model=AssessmentListResponse)
-@router.get("/", response_model=AssessmentListResponse)
+@router.get("")
+@router.get("/")
 async def get_user_assessments(current_user: User = Depends(get_current_user)):
     """Get user's assessments"""
     try:
-        print(f"Getting assessments for user: {current_user.id}, role: {current_user.role}")
+        logger.debug("Getting assessments for user: %s, role: %s", current_user.id, current_user.role)
         
         # Only students can view their assessments
         if current_user.role != "student":
@@ -151,25 +146,31 @@ async def get_user_assessments(current_user: User = Depends(get_current_user)):
                 detail="Only students can view assessments"
             )
         
-        # Get all assessments for the user
-        assessments = await Assessment.find(
+        # Fetch recent and incomplete assessments in one round trip, projected onto the summary view
+        summary_projection = {"$project": AssessmentSummary.Settings.projection}
+        facets = await Assessment.find(
             Assessment.user_id == str(current_user.id)
-        ).sort(-Assessment.id).limit(10).to_list()  # Sort by ID instead of created_at
-        
-        print(f"Found {len(assessments)} assessments")
+        ).aggregate([
+            {"$facet": {
+                "recent": [
+                    {"$sort": {"_id": -1}},  # Sort by ID instead of created_at
+                    {"$limit": 10},
+                    summary_projection
+                ],
+                "incomplete": [
+                    {"$match": {"status": {"$in": list(INCOMPLETE_STATUSES)}}},
+                    summary_projection
+                ]
+            }}
+        ], hint="user_id_recent").to_list()  # Several indexes lead with user_id; skip plan racing
+        facet = facets[0] if facets else {}
+        assessments = [AssessmentSummary.model_validate(doc) for doc in facet.get("recent", [])]
+        incomplete_assessments = [AssessmentSummary.model_validate(doc) for doc in facet.get("incomplete", [])]
         
-        # Get incomplete assessments
-        incomplete_assessments = await Assessment.find(
-            Assessment.user_id == str(current_user.id),
-            Or(
-                Assessment.status == AssessmentStatus.NOT_STARTED,
-                Assessment.status == AssessmentStatus.IN_PROGRESS
-            )
-        ).to_list()
-        
-        print(f"Found {len(incomplete_assessments)} incomplete assessments")
+        logger.debug("Found %d assessments, %d incomplete", len(assessments), len(incomplete_assessments))
         
-        # Format response
+        # Format response; every row shares one timestamp
+        now = datetime.now()
         assessment_list = []
         for assessment in assessments:
             assessment_data = {
@@ -178,8 +179,8 @@ async def get_user_assessments(current_user: User = Depends(get_current_user)):
                 "assessment_type": assessment.assessment_type,
                 "subject": assessment.subject,
                 "status": assessment.status,
-                "created_at": datetime.now(),  # Use current time since Assessment doesn't have created_at
-                "results": assessment.results.dict() if assessment.results else None
+                "created_at": now,  # Use current time since Assessment doesn't have created_at
+                "results": assessment.results.model_dump() if assessment.results else None
             }
             assessment_list.append(assessment_data)
         
@@ -192,18 +193,19 @@ async def get_user_assessments(current_user: User = Depends(get_current_user)):
                 "subject": assessment.subject,
                 "status": assessment.status,
                 "last_accessed_at": assessment.last_accessed_at,
-                "progress": assessment.get_progress()
+                "progress": assessment.progress
             }
             incomplete_list.append(incomplete_data)
         
-        return AssessmentListResponse(
-            assessments=assessment_list,
-            incomplete_assessments=incomplete_list
-        )
+        # Rows are plain dicts of JSON-native values, so skip response-model validation and encoding
+        return ORJSONResponse({
+            "assessments": assessment_list,
+            "incomplete_assessments": incomplete_list
+        })
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in get_user_assessments: {e}")
+        logger.error("❌ Error in get_user_assessments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get assessments: {str(e)}"
@@ -235,9 +237,9 @@ async def get_assessment(
         "assessment_type": assessment.assessment_type,
         "subject": assessment.subject,
         "topics": assessment.topics,
-        "config": assessment.config.dict(),
+        "config": assessment.config.model_dump(),
         "status": assessment.status,
-        "results": assessment.results.dict() if assessment.results else None,
+        "results": assessment.results.model_dump() if assessment.results else None,
         "created_at": datetime.now()  # Use current time since Assessment doesn't have created_at
     }
 
@@ -266,31 +268,35 @@ async def generate_questions_for_assessment(
     
     return questions
 
-async def auto_submit_assessment(assessment: Assessment):
-    """Auto-submit an incomplete assessment"""
-    # Calculate score for answered questions
-    answered_questions = [q for q in assessment.questions if q.is_answered]
-    correct_answers = sum(1 for q in answered_questions if q.is_correct)
-    
-    # Update results
-    assessment.results.total_questions = len(assessment.questions)
-    assessment.results.answered_questions = len(answered_questions)
-    assessment.results.correct_answers = correct_answers
-    assessment.results.incorrect_answers = len(answered_questions) - correct_answers
-    assessment.results.skipped_questions = len(assessment.questions) - len(answered_questions)
-    
-    if len(answered_questions) > 0:
-        assessment.results.percentage = (correct_answers / len(answered_questions)) * 100
-    else:
-        assessment.results.percentage = 0
-    
-    assessment.results.score = assessment.results.percentage
-    assessment.results.passed = assessment.results.percentage >= assessment.config.passingScore
-    
-    # Update status
-    assessment.status = AssessmentStatus.COMPLETED
-    assessment.end_time = datetime.now()
-    assessment.auto_submitted = True
-    assessment.completion_reason = "auto-submitted"
-    
-    await assessment.save()
+def auto_submit_pipeline(now: datetime) -> List[Dict[str, Any]]:
+    """Update pipeline that scores and auto-submits incomplete assessments inside MongoDB"""
+    answered = {"$filter": {"input": {"$ifNull": ["$questions", []]}, "cond": "$$this.is_answered"}}
+    return [
+        # Count answered and correct questions
+        {"$set": {
+            "_total": {"$size": {"$ifNull": ["$questions", []]}},
+            "_answered": {"$size": answered},
+            "_correct": {"$size": {"$filter": {"input": answered, "cond": {"$eq": ["$$this.is_correct", True]}}}}
+        }},
+        {"$set": {"_percentage": {"$cond": [
+            {"$gt": ["$_answered", 0]},
+            {"$multiply": [{"$divide": ["$_correct", "$_answered"]}, 100]},
+            0
+        ]}}},
+        # Update results and status
+        {"$set": {
+            "results.total_questions": "$_total",
+            "results.answered_questions": "$_answered",
+            "results.correct_answers": "$_correct",
+            "results.incorrect_answers": {"$subtract": ["$_answered", "$_correct"]},
+            "results.skipped_questions": {"$subtract": ["$_total", "$_answered"]},
+            "results.percentage": "$_percentage",
+            "results.score": "$_percentage",
+            "results.passed": {"$gte": ["$_percentage", {"$ifNull": ["$config.passingScore", 60.0]}]},
+            "status": AssessmentStatus.COMPLETED.value,
+            "end_time": now,
+            "auto_submitted": True,
+            "completion_reason": CompletionReason.AUTO_SUBMITTED.value
+        }},
+        {"$project": {"_total": 0, "_answered": 0, "_correct": 0, "_percentage": 0}}
+    ]
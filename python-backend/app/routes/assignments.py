@@ -3,70 +3,154 @@ Assignment routes for Python backend
 Equivalent to Node.js assignment routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict, Any
-from app.routes.auth import get_current_user
-from app.models.user import User, UserRole
-from app.models.assessment import Assessment, AssessmentStatus
+import time
+import asyncio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from collections import defaultdict
+from beanie import PydanticObjectId
+from beanie.operators import In
+from app.routes.auth import get_current_user, invalidate_cached_user
+from app.responses import ORJSONResponse
+from app.models.user import User, UserRole, StudentSummary
+from app.models.assessment import Assessment, AssessmentStatus, CompletedAssessmentSummary
 
 router = APIRouter()
 
+RECENT_ASSESSMENTS_PER_STUDENT = 5
+
+# Batch figures for a student with no completed assessments
+NO_ASSESSMENT_STATS = {"count": 0, "average": 0, "last": None}
+
+# Performance pages are cached briefly per instructor/batch/student since instructors reload them;
+# entries hold the encoded response body so cache hits skip serialization too
+PERFORMANCE_CACHE_TTL = 30  # seconds
+_performance_cache: Dict[str, Tuple[float, bytes]] = {}
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Enum values resolved once for role checks and query filters
+STAFF_ROLES = frozenset({UserRole.INSTRUCTOR.value, UserRole.ADMIN.value})
+STUDENT_ROLE = UserRole.STUDENT.value
+COMPLETED_STATUS = AssessmentStatus.COMPLETED.value
+
 def require_instructor_or_admin(current_user: User = Depends(get_current_user)):
     """Require instructor or admin role"""
-    if current_user.role not in [UserRole.INSTRUCTOR, UserRole.ADMIN]:
+    if current_user.role not in STAFF_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Instructor or admin access required"
         )
     return current_user
 
+def _cached_performance(key: str) -> Optional[Response]:
+    """Return a cached performance response if it is still fresh"""
+    entry = _performance_cache.get(key)
+    if entry and time.monotonic() - entry[0] < PERFORMANCE_CACHE_TTL:
+        return Response(content=entry[1], media_type="application/json")
+    return None
+
+def _cache_performance(key: str, payload: Dict[str, Any]) -> ORJSONResponse:
+    """Encode and store a performance payload, dropping expired entries so only recent pages stay cached"""
+    response = ORJSONResponse(payload)
+    now = time.monotonic()
+    for stale in [k for k, (at, _) in _performance_cache.items() if now - at >= PERFORMANCE_CACHE_TTL]:
+        del _performance_cache[stale]
+    _performance_cache[key] = (now, response.body)
+    return response
+
+async def _single_flight(key: str, build: Callable[[], Awaitable[Any]]) -> Any:
+    """Run build() once per key at a time; concurrent callers await the same result"""
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await build()
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved in case no one else was waiting
+        raise
+    finally:
+        _inflight.pop(key, None)
+        if not future.done():
+            future.cancel()  # The leading request was cancelled; don't leave followers waiting
+
+async def _completed_assessments_by_student(students: List[StudentSummary]) -> Dict[str, List[CompletedAssessmentSummary]]:
+    """Completed assessments for many students in one query, grouped by user_id, newest first"""
+    assessments = await Assessment.find(
+        In(Assessment.user_id, [str(student.id) for student in students]),
+        Assessment.status == COMPLETED_STATUS
+    ).sort(-Assessment.end_time).aggregate([], projection_model=CompletedAssessmentSummary).to_list()
+
+    by_student: Dict[str, List[CompletedAssessmentSummary]] = defaultdict(list)
+    for assessment in assessments:
+        by_student[assessment.user_id].append(assessment)
+    return by_student
+
+async def _load_my_students(cache_key: str, instructor_id: str) -> bytes:
+    """Build, cache and encode an instructor's student roster"""
+    students = await User.find(
+        User.assigned_instructor == instructor_id,
+        User.role == STUDENT_ROLE,
+        User.is_active == True
+    ).project(StudentSummary).to_list()
+
+    # Get completed assessments for all students in one query, newest first
+    assessments_by_student = await _completed_assessments_by_student(students)
+
+    students_with_performance = []
+    for student in students:
+        student_id = str(student.id)
+        recent_assessments = assessments_by_student[student_id][:RECENT_ASSESSMENTS_PER_STUDENT]
+
+        student_data = {
+            "id": student_id,
+            "first_name": student.first_name,
+            "last_name": student.last_name,
+            "email": student.email,
+            "department": student.department,
+            "year": student.year,
+            "roll_number": student.roll_number,
+            "batch": student.batch,
+            "section": student.section,
+            "performance_metrics": student.performance_metrics.model_dump() if student.performance_metrics else None,
+            "recent_assessments": [
+                {
+                    "id": assessment.id,  # ObjectIds are encoded by ORJSONResponse
+                    "assessment_type": assessment.assessment_type,
+                    "subject": assessment.subject,
+                    "score": assessment.score,
+                    "completed_at": assessment.end_time,
+                    "time_spent": assessment.time_spent
+                }
+                for assessment in recent_assessments
+            ]
+        }
+        students_with_performance.append(student_data)
+
+    return _cache_performance(cache_key, {
+        "students": students_with_performance,
+        "total_count": len(students_with_performance)
+    }).body
+
 @router.get("/my-students")
 async def get_my_students(instructor: User = Depends(require_instructor_or_admin)):
     """Get students assigned to an instructor"""
     try:
-        students = await User.find(
-            User.assigned_instructor == str(instructor.id),
-            User.role == UserRole.STUDENT,
-            User.is_active == True
-        ).to_list()
+        cache_key = f"instructor:{instructor.id}"
+        cached = _cached_performance(cache_key)
+        if cached is not None:
+            return cached
 
-        # Get recent assessments for each student
-        students_with_performance = []
-        for student in students:
-            recent_assessments = await Assessment.find(
-                Assessment.user_id == str(student.id),
-                Assessment.status == AssessmentStatus.COMPLETED
-            ).sort(-Assessment.end_time).limit(5).to_list()
-
-            student_data = {
-                "id": str(student.id),
-                "first_name": student.first_name,
-                "last_name": student.last_name,
-                "email": student.email,
-                "department": student.department,
-                "year": student.year,
-                "roll_number": student.roll_number,
-                "batch": student.batch,
-                "section": student.section,
-                "performance_metrics": student.performance_metrics.dict() if student.performance_metrics else None,
-                "recent_assessments": [
-                    {
-                        "id": str(assessment.id),
-                        "assessment_type": assessment.assessment_type,
-                        "subject": assessment.subject,
-                        "score": assessment.results.score if assessment.results else None,
-                        "completed_at": assessment.end_time,
-                        "time_spent": assessment.time_spent
-                    }
-                    for assessment in recent_assessments
-                ]
-            }
-            students_with_performance.append(student_data)
-
-        return {
-            "students": students_with_performance,
-            "total_count": len(students_with_performance)
-        }
+        # Concurrent dashboard loads for the same instructor share one build
+        body = await _single_flight(cache_key, lambda: _load_my_students(cache_key, str(instructor.id)))
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -95,39 +179,55 @@ async def get_student_performance(
                 detail="Access denied to this student"
             )
 
-        # Get all completed assessments
-        assessments = await Assessment.find(
-            Assessment.user_id == student_id,
-            Assessment.status == AssessmentStatus.COMPLETED
-        ).sort(-Assessment.end_time).to_list()
+        cache_key = f"student_perf:{student_id}"
+        cached = _cached_performance(cache_key)
+        if cached is not None:
+            return cached
+
+        # Per-subject figures are grouped in the database; only the recent list loads documents.
+        # The two queries are independent, so run them concurrently
+        subject_groups, assessments = await asyncio.gather(
+            Assessment.find(
+                Assessment.user_id == student_id,
+                Assessment.status == COMPLETED_STATUS
+            ).aggregate([
+                {"$sort": {"end_time": -1}},
+                {"$group": {
+                    "_id": "$subject",
+                    "total": {"$sum": 1},
+                    "scores": {"$push": "$results.score"},
+                    "score_sum": {"$sum": "$results.score"},
+                    "average": {"$avg": "$results.score"},
+                    "last": {"$max": "$end_time"}
+                }},
+                {"$sort": {"last": -1}}
+            ]).to_list(),
+            Assessment.find(
+                Assessment.user_id == student_id,
+                Assessment.status == COMPLETED_STATUS
+            ).sort(-Assessment.end_time).limit(10).aggregate(
+                [], projection_model=CompletedAssessmentSummary
+            ).to_list()
+        )
 
         # Calculate performance metrics
-        total_assessments = len(assessments)
-        total_score = sum(a.results.score for a in assessments if a.results)
+        total_assessments = sum(group["total"] for group in subject_groups)
+        total_score = sum(group["score_sum"] for group in subject_groups)
         average_score = total_score / total_assessments if total_assessments > 0 else 0
 
         # Group by subject
-        subject_performance = {}
-        for assessment in assessments:
-            subject = assessment.subject
-            if subject not in subject_performance:
-                subject_performance[subject] = {
-                    "total": 0,
-                    "scores": [],
-                    "average": 0
-                }
-            subject_performance[subject]["total"] += 1
-            if assessment.results:
-                subject_performance[subject]["scores"].append(assessment.results.score)
-
-        # Calculate averages
-        for subject, data in subject_performance.items():
-            if data["scores"]:
-                data["average"] = sum(data["scores"]) / len(data["scores"])
+        subject_performance = {
+            group["_id"]: {
+                "total": group["total"],
+                "scores": group["scores"],
+                "average": group["average"] or 0
+            }
+            for group in subject_groups
+        }
 
-        return {
+        return _cache_performance(cache_key, {
             "student": {
-                "id": str(student.id),
+                "id": student.id,
                 "name": f"{student.first_name} {student.last_name}",
                 "email": student.email,
                 "department": student.department,
@@ -140,18 +240,18 @@ async def get_student_performance(
                 "subject_breakdown": subject_performance,
                 "recent_assessments": [
                     {
-                        "id": str(a.id),
+                        "id": a.id,
                         "title": a.title,
                         "assessment_type": a.assessment_type,
                         "subject": a.subject,
-                        "score": a.results.score if a.results else None,
+                        "score": a.score,
                         "completed_at": a.end_time,
                         "time_spent": a.time_spent
                     }
-                    for a in assessments[:10]  # Last 10 assessments
+                    for a in assessments  # Last 10 assessments
                 ]
             }
-        }
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -172,8 +272,14 @@ async def assign_student_to_instructor(
         )
 
     try:
+        # Load both users in one query
+        users = await User.find(
+            In(User.id, [PydanticObjectId(student_id), PydanticObjectId(instructor_id)])
+        ).to_list()
+        users_by_id = {str(user.id): user for user in users}
+
         # Verify student exists
-        student = await User.get(student_id)
+        student = users_by_id.get(student_id)
         if not student or student.role != UserRole.STUDENT:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -181,7 +287,7 @@ async def assign_student_to_instructor(
             )
 
         # Verify instructor exists
-        instructor = await User.get(instructor_id)
+        instructor = users_by_id.get(instructor_id)
         if not instructor or instructor.role != UserRole.INSTRUCTOR:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -189,8 +295,13 @@ async def assign_student_to_instructor(
             )
 
         # Assign student to instructor
-        student.assigned_instructor = instructor_id
-        await student.save()
+        previous_instructor = student.assigned_instructor
+        await student.set({User.assigned_instructor: instructor_id})
+        invalidate_cached_user(student_id)
+
+        # Both rosters changed; don't serve them from the cache
+        _performance_cache.pop(f"instructor:{instructor_id}", None)
+        _performance_cache.pop(f"instructor:{previous_instructor}", None)
 
         return {
             "message": "Student assigned to instructor successfully",
@@ -205,47 +316,80 @@ async def assign_student_to_instructor(
             detail=f"Error assigning student: {str(e)}"
         )
 
+def _batch_stats_query(students: List[StudentSummary]):
+    """Count, average score and latest completion per student, grouped in the database, best first"""
+    return Assessment.find(
+        In(Assessment.user_id, [str(student.id) for student in students]),
+        Assessment.status == COMPLETED_STATUS
+    ).aggregate([
+        {"$group": {
+            "_id": "$user_id",
+            "count": {"$sum": 1},
+            "average": {"$avg": "$results.score"},
+            "last": {"$max": "$end_time"}
+        }},
+        {"$sort": {"average": -1}}
+    ])
+
+def _batch_row(student: StudentSummary, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """One student's line in the batch performance listing"""
+    return {
+        "student_id": str(student.id),
+        "name": f"{student.first_name} {student.last_name}",
+        "roll_number": student.roll_number,
+        "total_assessments": stats["count"],
+        "average_score": stats["average"] or 0,
+        "last_assessment": stats["last"]
+    }
+
+async def _stream_batch_rows(students: List[StudentSummary]):
+    """Yield batch rows as NDJSON straight off the stats cursor, best average first;
+    students without completed assessments (average 0) follow at the end"""
+    remaining = {str(student.id): student for student in students}
+    async for stats in _batch_stats_query(students):
+        student = remaining.pop(stats["_id"], None)
+        if student:
+            yield orjson.dumps(_batch_row(student, stats)) + b"\n"
+    for student in remaining.values():
+        yield orjson.dumps(_batch_row(student, NO_ASSESSMENT_STATS)) + b"\n"
+
 @router.get("/batch-performance")
 async def get_batch_performance(
     batch: str,
+    format: str = "json",
     instructor: User = Depends(require_instructor_or_admin)
 ):
-    """Get performance data for all students in a batch"""
+    """Get performance data for all students in a batch; format=ndjson streams the student rows instead"""
     try:
+        cache_key = f"batch:{batch}"
+        cached = _cached_performance(cache_key) if format != "ndjson" else None
+        if cached is not None:
+            return cached
+
         students = await User.find(
             User.batch == batch,
-            User.role == UserRole.STUDENT,
+            User.role == STUDENT_ROLE,
             User.is_active == True
-        ).to_list()
+        ).project(StudentSummary).to_list()
 
-        batch_performance = []
-        for student in students:
-            assessments = await Assessment.find(
-                Assessment.user_id == str(student.id),
-                Assessment.status == AssessmentStatus.COMPLETED
-            ).to_list()
+        if format == "ndjson":
+            return StreamingResponse(_stream_batch_rows(students), media_type="application/x-ndjson")
 
-            total_score = sum(a.results.score for a in assessments if a.results)
-            average_score = total_score / len(assessments) if assessments else 0
-
-            batch_performance.append({
-                "student_id": str(student.id),
-                "name": f"{student.first_name} {student.last_name}",
-                "roll_number": student.roll_number,
-                "total_assessments": len(assessments),
-                "average_score": average_score,
-                "last_assessment": assessments[0].end_time if assessments else None
-            })
+        stats_by_student = {row["_id"]: row for row in await _batch_stats_query(students).to_list()}
+        batch_performance = [
+            _batch_row(student, stats_by_student.get(str(student.id), NO_ASSESSMENT_STATS))
+            for student in students
+        ]
 
         # Sort by average score (descending)
         batch_performance.sort(key=lambda x: x["average_score"], reverse=True)
 
-        return {
+        return _cache_performance(cache_key, {
             "batch": batch,
             "total_students": len(batch_performance),
             "students": batch_performance,
             "batch_average": sum(s["average_score"] for s in batch_performance) / len(batch_performance) if batch_performance else 0
-        }
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
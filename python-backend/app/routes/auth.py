@@ -3,28 +3,39 @@ Authentication routes for Python backend
 Equivalent to Node.js auth routes
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, Dict, Tuple
 import jwt
+from pymongo.errors import DuplicateKeyError
+import bcrypt
+import asyncio
+import time
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
-from app.models.user import User, UserRole
+from app.models.user import User, UserRole, run_bcrypt
 from app.database import get_database
+from app.logger import get_logger
 
 load_dotenv("config.env")
 
 router = APIRouter()
 security = HTTPBearer()
+logger = get_logger(__name__)
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # Increased to 1 hour
 
+# Authenticated users are cached briefly so each request doesn't re-read the user document
+USER_CACHE_TTL = 30  # seconds
+USER_CACHE_SIZE = 10000
+_user_cache: Dict[str, Tuple[float, User]] = {}
+
 class UserRegister(BaseModel):
     email: EmailStr
     password: str
@@ -62,6 +73,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def invalidate_cached_user(user_id: str):
+    """Drop a user from the auth cache after their document changes"""
+    _user_cache.pop(user_id, None)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current user from JWT token"""
     credentials_exception = HTTPException(
@@ -72,56 +87,67 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     
     # Check if token is valid
     if not credentials.credentials or credentials.credentials == "undefined" or credentials.credentials == "null":
-        print("Invalid token: token is undefined or null")  # Debug log
+        logger.debug("Invalid token: token is undefined or null")
         raise credentials_exception
     
     try:
-        print(f"Validating token: {credentials.credentials[:20]}...")  # Debug log
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            print("No user_id in token payload")  # Debug log
+            logger.debug("No user_id in token payload")
             raise credentials_exception
         token_data = TokenData(user_id=user_id)
     except jwt.PyJWTError as e:
-        print(f"JWT decode error: {e}")  # Debug log
+        logger.debug("JWT decode error: %s", e)
         raise credentials_exception
     
+    cached = _user_cache.get(token_data.user_id)
+    if cached and time.monotonic() - cached[0] < USER_CACHE_TTL:
+        return cached[1]
+    
     user = await User.get(token_data.user_id)
     if user is None:
-        print(f"User not found for ID: {token_data.user_id}")  # Debug log
+        logger.debug("User not found for ID: %s", token_data.user_id)
         raise credentials_exception
+    
+    # Evict the oldest entry once full
+    if len(_user_cache) >= USER_CACHE_SIZE:
+        _user_cache.pop(next(iter(_user_cache)))
+    _user_cache[token_data.user_id] = (time.monotonic(), user)
     return user
 
+async def _record_login(user: User, logged_in_at: datetime):
+    """Persist the last login time and drop the stale cached user"""
+    await user.set({User.last_login: logged_in_at})
+    invalidate_cached_user(str(user.id))
+
 @router.post("/register", response_model=Token)
 async def register(user_data: UserRegister):
     """Register a new user"""
     try:
-        print(f"Register request received for email: {user_data.email}")  # Debug log
+        logger.debug("Register request received for email: %s", user_data.email)
         
-        # Check if user already exists
-        existing_user = await User.find_one(User.email == user_data.email)
+        # Check email and roll number (if provided) uniqueness concurrently
+        existing_user, existing_roll = await asyncio.gather(
+            User.find_one(User.email == user_data.email),
+            User.find_one(User.roll_number == user_data.rollNumber) if user_data.rollNumber else asyncio.sleep(0)
+        )
         if existing_user:
-            print(f"Email already exists: {user_data.email}")  # Debug log
+            logger.debug("Email already exists: %s", user_data.email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
+        if existing_roll:
+            logger.debug("Roll number already exists: %s", user_data.rollNumber)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Roll number already registered"
+            )
         
-        # Check if roll number already exists (if provided)
-        if user_data.rollNumber:
-            existing_roll = await User.find_one(User.roll_number == user_data.rollNumber)
-            if existing_roll:
-                print(f"Roll number already exists: {user_data.rollNumber}")  # Debug log
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Roll number already registered"
-                )
-        
-        # Hash password first
-        import bcrypt
+        # Hash password first; bcrypt is CPU-bound, so keep it off the event loop
         salt = bcrypt.gensalt(rounds=12)
-        hashed_password = bcrypt.hashpw(user_data.password.encode('utf-8'), salt).decode('utf-8')
+        hashed_password = (await run_bcrypt(bcrypt.hashpw, user_data.password.encode('utf-8'), salt)).decode('utf-8')
         
         # Create new user with all required fields
         user = User(
@@ -136,9 +162,15 @@ async def register(user_data: UserRegister):
             role=user_data.role
         )
         
-        # Save user
-        await user.insert()
-        print(f"User created successfully: {user.email}")  # Debug log
+        # Save user; the unique indexes still catch a concurrent registration
+        try:
+            await user.insert()
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email or roll number already registered"
+            )
+        logger.debug("User created successfully: %s", user.email)
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -165,22 +197,22 @@ async def register(user_data: UserRegister):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Unexpected error in register: {e}")  # Debug log
+        logger.error("❌ Unexpected error in register: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
         )
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin):
+async def login(user_data: UserLogin, background_tasks: BackgroundTasks):
     """Login user"""
     try:
-        print(f"Login request received for email: {user_data.email}")  # Debug log
+        logger.debug("Login request received for email: %s", user_data.email)
         
         # Find user by email
         user = await User.find_one(User.email == user_data.email)
         if not user:
-            print(f"User not found for email: {user_data.email}")  # Debug log
+            logger.debug("User not found for email: %s", user_data.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -188,15 +220,14 @@ async def login(user_data: UserLogin):
         
         # Check password
         if not await user.check_password(user_data.password):
-            print(f"Invalid password for email: {user_data.email}")  # Debug log
+            logger.debug("Invalid password for email: %s", user_data.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
-        # Update last login
-        user.last_login = datetime.now()
-        await user.save()
+        # Update last login after the response is sent; the token doesn't depend on it
+        background_tasks.add_task(_record_login, user, datetime.now())
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -204,7 +235,7 @@ async def login(user_data: UserLogin):
             data={"sub": str(user.id)}, expires_delta=access_token_expires
         )
         
-        print(f"Login successful for email: {user_data.email}")  # Debug log
+        logger.debug("Login successful for email: %s", user_data.email)
         
         return {
             "access_token": access_token,
@@ -225,7 +256,7 @@ async def login(user_data: UserLogin):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Unexpected error in login: {e}")  # Debug log
+        logger.error("❌ Unexpected error in login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Login failed: {str(e)}"
@@ -270,4 +301,5 @@ async def get_profile(current_user: User = Depends(get_current_user)):
 @router.post("/logout")
 async def logout(current_user: User = Depends(get_current_user)):
     """Logout user (client should discard token)"""
+    invalidate_cached_user(str(current_user.id))
     return {"message": "Successfully logged out"}
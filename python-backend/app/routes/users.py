@@ -4,7 +4,8 @@ User routes for Python backend
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.routes.auth import get_current_user
-from app.models.user import User
+from beanie import PydanticObjectId
+from app.models.user import User, UserAnalyticsSummary
 from typing import Optional
 
 router = APIRouter()
@@ -24,8 +25,8 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
         "rollNumber": current_user.roll_number,  # Use camelCase for frontend
         "is_active": current_user.is_active,
         "last_login": current_user.last_login,
-        "student_profile": current_user.student_profile.dict() if current_user.student_profile else None,
-        "performance_metrics": current_user.performance_metrics.dict()
+        "student_profile": current_user.student_profile.model_dump() if current_user.student_profile else None,
+        "performance_metrics": current_user.performance_metrics.model_dump()
     }
 
 @router.get("/{user_id}/analytics")
@@ -42,8 +43,14 @@ async def get_user_analytics(
             detail="Access denied"
         )
     
-    # Get the target user
-    target_user = await User.get(user_id)
+    # Get the target user; callers viewing their own analytics are already loaded
+    if str(current_user.id) == user_id:
+        target_user = current_user
+    else:
+        target_user = await User.find_one(
+            User.id == PydanticObjectId(user_id),
+            projection_model=UserAnalyticsSummary
+        )
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -53,8 +60,8 @@ async def get_user_analytics(
     return {
         "user_id": str(target_user.id),
         "period": period,
-        "performance_metrics": target_user.performance_metrics.dict(),
-        "student_profile": target_user.student_profile.dict() if target_user.student_profile else None,
+        "performance_metrics": target_user.performance_metrics.model_dump(),
+        "student_profile": target_user.student_profile.model_dump() if target_user.student_profile else None,
         "analytics": {
             "total_assessments": target_user.performance_metrics.total_assessments,
             "average_score": target_user.performance_metrics.average_score,
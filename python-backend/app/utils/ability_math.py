@@ -0,0 +1,44 @@
+"""
+Adaptive ability math for Python backend
+Ability steps used by Assessment plus the IRT kernels used for item selection
+"""
+
+import numpy as np
+
+# Ability step size and how strongly each difficulty scales it
+ABILITY_STEP = 0.1
+DIFFICULTY_FACTORS = {"easy": 0.5, "medium": 1.0, "hard": 1.5}
+DEFAULT_DIFFICULTY_FACTOR = 1.5
+
+# 0-100 difficulty scores map onto the ability scale around this center, SCALE points per unit
+DIFFICULTY_SCORE_CENTER = 50.0
+DIFFICULTY_SCORE_SCALE = 25.0
+
+# Logistic scaling constant that brings the 3PL model close to the normal ogive
+IRT_SCALING = 1.7
+
+def difficulty_factor(difficulty: str) -> float:
+    """Step multiplier for a question difficulty; unknown difficulties count as hard"""
+    return DIFFICULTY_FACTORS.get(difficulty, DEFAULT_DIFFICULTY_FACTOR)
+
+def item_difficulty(difficulty_score: float) -> float:
+    """IRT difficulty (b) on the ability scale for a 0-100 question difficulty score"""
+    return (difficulty_score - DIFFICULTY_SCORE_CENTER) / DIFFICULTY_SCORE_SCALE
+
+def step_ability(current: float, is_correct: bool, factor: float) -> float:
+    """Move an ability estimate one step up or down after a response"""
+    return current + (ABILITY_STEP if is_correct else -ABILITY_STEP) * factor
+
+def response_probability(theta, a: np.ndarray, b: np.ndarray, c: np.ndarray, d=1.0) -> np.ndarray:
+    """Probability of a correct response under the scaled 4PL model (3PL when d is 1)"""
+    # Logistic via tanh: one transcendental call and no overflow for large |z|
+    return c + (d - c) * 0.5 * (1 + np.tanh(0.5 * IRT_SCALING * a * (theta - b)))
+
+def fisher_information(theta, a: np.ndarray, b: np.ndarray, c: np.ndarray, d=1.0) -> np.ndarray:
+    """Fisher information of every item at ability theta (scaled 4PL; 3PL when d is 1)"""
+    p = response_probability(theta, a, b, c, d)
+    q = 1 - p
+    dp = IRT_SCALING * a * (p - c) * (d - p) / (d - c)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        information = dp * dp / (p * q)
+    return np.nan_to_num(information, nan=0.0, posinf=0.0)
@@ -4,18 +4,281 @@ Equivalent to Node.js adaptiveAlgorithm.js
 """
 
 import math
-from typing import List, Dict, Any, Optional
+import random
+from typing import List, Dict, Any, Optional, Iterable, Union, Callable, Sequence
 import numpy as np
+from app.utils.ability_math import fisher_information, response_probability
+
+# Ability grid for precomputed information tables
+THETA_GRID = np.linspace(-4.0, 4.0, 1024)
+
+# Ability grid the response log-likelihood is evaluated on
+LIKELIHOOD_GRID = np.linspace(-4.0, 4.0, 65)
+
+# Response probabilities are kept this far from 0 and 1 so their logs stay finite
+PROBABILITY_EPSILON = 1e-12
+
+def _item_parameters(questions: List[Dict]):
+    """Item parameters (a, b, c, d) as float arrays, one entry per question"""
+    n = len(questions)
+    return (
+        np.fromiter((q.get('discrimination', 0.5) for q in questions), float, n),
+        np.fromiter((q.get('difficulty', 0.5) for q in questions), float, n),
+        np.fromiter((q.get('guessing', 0.25) for q in questions), float, n),
+        np.fromiter((q.get('upper_asymptote', 1.0) for q in questions), float, n),
+    )
+
+def _grid_log_probabilities(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray):
+    """log P(correct) and log P(wrong) of every item at every LIKELIHOOD_GRID point"""
+    p = response_probability(LIKELIHOOD_GRID[:, None], a, b, c, d)
+    p = np.clip(p, PROBABILITY_EPSILON, 1 - PROBABILITY_EPSILON)
+    return np.log(p), np.log1p(-p)
+
+def _grid_maximum(log_likelihood: np.ndarray) -> np.ndarray:
+    """Ability maximizing each row of a (rows x LIKELIHOOD_GRID) log-likelihood
+
+    Takes the best grid point per row and refines it with a parabola through
+    its neighbours; maxima on the edge of the grid (e.g. all correct or all
+    wrong) are returned as is.
+    """
+    last = len(LIKELIHOOD_GRID) - 1
+    step = LIKELIHOOD_GRID[1] - LIKELIHOOD_GRID[0]
+    rows = np.arange(log_likelihood.shape[0])
+    k = np.argmax(log_likelihood, axis=1)
+    inner = np.clip(k, 1, last - 1)
+
+    left = log_likelihood[rows, inner - 1]
+    centre = log_likelihood[rows, inner]
+    right = log_likelihood[rows, inner + 1]
+    curvature = left - 2 * centre + right
+    refine = (k > 0) & (k < last) & (curvature < 0)
+    offset = 0.5 * step * (left - right) / np.where(refine, curvature, -1.0)
+    return LIKELIHOOD_GRID[k] + np.where(refine, offset, 0.0)
+
+def _ability_solver(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray) -> Callable[[np.ndarray], float]:
+    """Maximum-likelihood ability solver specialized to one set of item parameters
+
+    The log response probabilities are tabulated once here; the returned
+    function scores a 0/1 outcome vector with two matrix-vector products.
+    """
+    log_p, log_q = _grid_log_probabilities(a, b, c, d)
+
+    def solve(y: np.ndarray) -> float:
+        if y.size == 0:
+            return 0.0
+
+        y = y.astype(float)
+        log_likelihood = log_p @ y + log_q @ (1 - y)
+        return float(_grid_maximum(log_likelihood[None, :])[0])
+
+    return solve
+
+def _estimate_ability(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray, y: np.ndarray) -> float:
+    """Maximum-likelihood ability estimate from item parameters and 0/1 outcomes"""
+    return _ability_solver(a, b, c, d)(y)
+
+class ItemBank:
+    """Question bank with item parameters stored column-wise for vectorized selection"""
+
+    def __init__(self, questions: List[Dict], precompute_information: bool = False):
+        self.questions = list(questions)
+        self.ids = [q.get('id') for q in self.questions]
+        self.index = {qid: i for i, qid in enumerate(self.ids)}
+        self.a, self.b, self.c, self.d = _item_parameters(self.questions)
+        self.info_table = self._build_info_table() if precompute_information else None
+        self._log_probabilities = None
+
+    def _build_info_table(self) -> np.ndarray:
+        """Information of every item at every THETA_GRID point, one row per grid point
+
+        Selection only compares items within a row, so each row is scaled to
+        its own maximum and stored as uint8 (0-255); the scales are dropped.
+        """
+        table = fisher_information(THETA_GRID[:, None], self.a, self.b, self.c, self.d)
+        row_max = table.max(axis=1, keepdims=True)
+        scale = np.divide(255.0, row_max, out=np.zeros_like(row_max), where=row_max > 0)
+        return np.rint(table * scale).astype(np.uint8)
+
+    def estimate_abilities(self, outcomes: np.ndarray, answered: np.ndarray) -> np.ndarray:
+        """Ability estimates for many students at once
+
+        outcomes and answered are (students x bank questions) arrays: 1 where
+        the student answered the question correctly, and True where the
+        student answered it at all. Students without answers get 0.0.
+        """
+        if self._log_probabilities is None:
+            self._log_probabilities = _grid_log_probabilities(self.a, self.b, self.c, self.d)
+        log_p, log_q = self._log_probabilities
+
+        answered = answered.astype(float)
+        correct = outcomes * answered
+        log_likelihood = correct @ log_p.T + (answered - correct) @ log_q.T
+        return np.where(answered.any(axis=1), _grid_maximum(log_likelihood), 0.0)
+
+    @staticmethod
+    def _grid_index(theta: float) -> int:
+        """Index of the THETA_GRID point nearest to theta, clamped to the grid"""
+        step = THETA_GRID[1] - THETA_GRID[0]
+        index = int(round((theta - THETA_GRID[0]) / step))
+        return min(max(index, 0), len(THETA_GRID) - 1)
+
+    def unanswered_mask(self, answered_questions: Iterable[str]) -> np.ndarray:
+        """Boolean mask of questions whose id is not in answered_questions"""
+        answered = set(answered_questions)
+        return np.fromiter((qid not in answered for qid in self.ids), bool, len(self.ids))
+
+    def information(self, theta: float, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fisher information of every (masked) question at the given ability"""
+        if mask is None:
+            return fisher_information(theta, self.a, self.b, self.c, self.d)
+        return fisher_information(theta, self.a[mask], self.b[mask], self.c[mask], self.d[mask])
+
+    def most_informative(self, theta: float, answered_questions: Iterable[str]) -> Optional[Dict]:
+        """Unanswered question with maximum information, None if none carries any"""
+        return self._select(theta, np.flatnonzero(self.unanswered_mask(answered_questions)))
+
+    def _select(self, theta: float, candidates: np.ndarray) -> Optional[Dict]:
+        """Most informative question among candidate positions"""
+        if candidates.size == 0:
+            return None
+
+        if self.info_table is not None:
+            # Rows are scaled over the whole bank, answered items included, so the
+            # remaining candidates can tie (all at 0 once the strongest items are
+            # used up); exact information breaks the tie
+            quantized = self.info_table[self._grid_index(theta)][candidates]
+            candidates = candidates[quantized == quantized.max()]
+        information = self.information(theta, candidates)
+        best = int(np.argmax(information))
+        if information[best] <= 0:
+            return None
+        return self.questions[candidates[best]]
+
+class AdaptiveSession:
+    """Responses of one adaptive attempt, buffered as arrays over an ItemBank
+
+    Each answer is appended in O(1) to preallocated item-position and
+    outcome vectors, so ability estimation and selection never go back
+    to the question and response dicts.
+    """
+
+    def __init__(self, bank: ItemBank, max_questions: int = 50):
+        self.bank = bank
+        self.items = np.empty(max_questions, dtype=np.intp)
+        self.y = np.empty(max_questions, dtype=np.uint8)
+        self.n = 0
+        self.answered = np.zeros(len(bank.ids), dtype=bool)
+        # Last estimate and the response count it was computed from
+        self._theta = 0.0
+        self._theta_n = 0
+
+    def record_response(self, question_id: str, is_correct: bool):
+        """Append the outcome of an answered bank question"""
+        if self.n == len(self.y):
+            raise ValueError("Session already holds the maximum number of responses")
+        position = self.bank.index[question_id]
+        self.items[self.n] = position
+        self.y[self.n] = is_correct
+        self.answered[position] = True
+        self.n += 1
+
+    def estimate_ability(self) -> float:
+        """Ability estimate from the recorded responses, recomputed only after new ones"""
+        if self._theta_n != self.n:
+            items = self.items[:self.n]
+            bank = self.bank
+            self._theta = _estimate_ability(bank.a[items], bank.b[items], bank.c[items], bank.d[items], self.y[:self.n])
+            self._theta_n = self.n
+        return self._theta
+
+    def next_question(self, theta: float) -> Optional[Dict]:
+        """Most informative question not yet answered in this session"""
+        return self.bank._select(theta, np.flatnonzero(~self.answered))
+
+# Per-question fields of generated adaptive questions
+ADAPTIVE_QUESTION_DTYPE = np.dtype([
+    ('difficulty_score', np.int32),
+    ('discrimination', np.float64),
+    ('guessing', np.float64),
+    ('upper_asymptote', np.float64),
+])
+
+class AdaptiveQuestionSet(Sequence):
+    """Generated adaptive questions kept as a structured array
+
+    Only the per-question numbers are stored; the question dict, with its
+    placeholder text and options, is built when an item is accessed.
+    """
+
+    def __init__(self, subject: str, topics: List[str], items: np.ndarray):
+        self.subject = subject
+        self.topics = topics
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("question index out of range")
+
+        item = self.items[index]
+        return self._question(index, item['difficulty_score'], item['discrimination'], item['guessing'], item['upper_asymptote'])
+
+    def __iter__(self):
+        # Convert each column to Python numbers once instead of indexing item by item
+        columns = (self.items[field].tolist() for field in ADAPTIVE_QUESTION_DTYPE.names)
+        for index, values in enumerate(zip(*columns)):
+            yield self._question(index, *values)
+
+    def _question(self, index: int, difficulty_score, discrimination, guessing, upper_asymptote) -> Dict:
+        topic = self.topics[index % len(self.topics)] if self.topics else self.subject
+        return {
+            'id': f'adaptive_q_{index+1}',
+            'question_text': f'Adaptive question {index+1} about {topic}',
+            'options': [
+                {'text': 'Option A', 'is_correct': False},
+                {'text': 'Option B', 'is_correct': False},
+                {'text': 'Option C', 'is_correct': True},
+                {'text': 'Option D', 'is_correct': False}
+            ],
+            'correct_answer': 2,
+            'difficulty': 'medium',
+            'difficulty_score': int(difficulty_score),
+            'subject': self.subject,
+            'topic': topic,
+            'discrimination': float(discrimination),
+            'guessing': float(guessing),
+            'upper_asymptote': float(upper_asymptote)
+        }
 
 class AdaptiveAlgorithm:
+    __slots__ = (
+        'ability_estimation_method', 'question_selection_strategy',
+        'max_questions', 'min_questions', 'standard_error_threshold', 'confidence_threshold',
+    )
+
     def __init__(self):
         self.ability_estimation_method = 'IRT'  # Item Response Theory
         self.question_selection_strategy = 'maximum_information'
-        self.termination_criteria = {
-            'max_questions': 50,
-            'min_questions': 10,
-            'standard_error_threshold': 0.3,
-            'confidence_threshold': 0.95
+        # Termination criteria
+        self.max_questions = 50
+        self.min_questions = 10
+        self.standard_error_threshold = 0.3
+        self.confidence_threshold = 0.95
+
+    @property
+    def termination_criteria(self) -> Dict[str, Any]:
+        """Termination criteria as a dict, matching the Node.js algorithm"""
+        return {
+            'max_questions': self.max_questions,
+            'min_questions': self.min_questions,
+            'standard_error_threshold': self.standard_error_threshold,
+            'confidence_threshold': self.confidence_threshold
         }
 
     def estimate_ability(self, responses: List[Dict], questions: List[Dict]) -> float:
@@ -23,93 +286,43 @@ class AdaptiveAlgorithm:
         if not responses:
             return 0.0
 
-        # Simple IRT implementation using Newton-Raphson method
-        theta = 0.0  # Initial ability estimate
-        max_iterations = 50
-        tolerance = 0.001
-
-        for iteration in range(max_iterations):
-            first_derivative = 0.0
-            second_derivative = 0.0
-
-            for i, response in enumerate(responses):
-                if i >= len(questions):
-                    continue
-                    
-                question = questions[i]
-                a = question.get('discrimination', 0.5)
-                b = question.get('difficulty', 0.5)
-                c = question.get('guessing', 0.25)
-                d = question.get('upper_asymptote', 1.0)
-
-                # Probability of correct response
-                z = a * (theta - b)
-                p = c + (d - c) / (1 + math.exp(-z))
-
-                # First and second derivatives
-                pq = p * (1 - p)
-                first_deriv = a * (response.get('is_correct', 0) - p) * (d - c) / pq
-                second_deriv = -a * a * (d - c) * (d - c) / (pq * pq)
-
-                first_derivative += first_deriv
-                second_derivative += second_deriv
-
-            if abs(second_derivative) < tolerance:
-                break
-
-            # Newton-Raphson update
-            new_theta = theta - first_derivative / second_derivative
-
-            if abs(new_theta - theta) < tolerance:
-                break
-
-            theta = new_theta
-
-        return theta
+        # Extract item parameters and outcomes once; the likelihood kernel works on whole arrays
+        n = min(len(responses), len(questions))
+        a, b, c, d = _item_parameters(questions[:n])
+        y = np.fromiter((response.get('is_correct', 0) for response in responses[:n]), float, n)
+        return _estimate_ability(a, b, c, d, y)
 
     def calculate_information(self, theta: float, question: Dict) -> float:
         """Calculate Fisher information for a question at given ability level"""
-        a = question.get('discrimination', 0.5)
-        b = question.get('difficulty', 0.5)
-        c = question.get('guessing', 0.25)
-        d = question.get('upper_asymptote', 1.0)
-
-        z = a * (theta - b)
-        p = c + (d - c) / (1 + math.exp(-z))
-
-        # Fisher information
-        information = (a * a * (d - c) * (d - c)) / (p * (1 - p))
-
-        return information
+        return float(fisher_information(theta, *_item_parameters([question]))[0])
 
     def select_next_question(self, 
                            current_ability: float, 
-                           available_questions: List[Dict], 
+                           available_questions: Union[List[Dict], ItemBank], 
                            answered_questions: List[str]) -> Optional[Dict]:
-        """Select the next question based on current ability estimate"""
+        """Select the next question based on current ability estimate
+
+        Callers selecting repeatedly from the same bank can pass an ItemBank
+        so item parameters are extracted only once.
+        """
+        if self.question_selection_strategy == 'maximum_information':
+            # Select question with maximum information at current ability
+            bank = available_questions if isinstance(available_questions, ItemBank) else ItemBank(available_questions)
+            return bank.most_informative(current_ability, answered_questions)
+
+        if isinstance(available_questions, ItemBank):
+            available_questions = available_questions.questions
         if not available_questions:
             return None
 
         # Filter out already answered questions
-        unanswered = [q for q in available_questions if q.get('id') not in answered_questions]
+        answered = set(answered_questions)
+        unanswered = [q for q in available_questions if q.get('id') not in answered]
         
         if not unanswered:
             return None
 
-        if self.question_selection_strategy == 'maximum_information':
-            # Select question with maximum information at current ability
-            best_question = None
-            max_information = 0
-
-            for question in unanswered:
-                information = self.calculate_information(current_ability, question)
-                if information > max_information:
-                    max_information = information
-                    best_question = question
-
-            return best_question
-
-        elif self.question_selection_strategy == 'closest_difficulty':
+        if self.question_selection_strategy == 'closest_difficulty':
             # Select question with difficulty closest to current ability
             best_question = None
             min_distance = float('inf')
@@ -127,18 +340,19 @@ class AdaptiveAlgorithm:
             # Random selection as fallback
             return random.choice(unanswered)
 
-    def calculate_standard_error(self, responses: List[Dict], questions: List[Dict]) -> float:
+    def calculate_standard_error(self, responses: List[Dict], questions: List[Dict], theta: Optional[float] = None) -> float:
         """Calculate standard error of ability estimate"""
         if not responses:
             return 1.0
 
-        theta = self.estimate_ability(responses, questions)
-        information_sum = 0.0
+        if theta is None:
+            theta = self.estimate_ability(responses, questions)
+        return self._standard_error_given_theta(theta, responses, questions)
 
-        for i, response in enumerate(responses):
-            if i < len(questions):
-                information = self.calculate_information(theta, questions[i])
-                information_sum += information
+    def _standard_error_given_theta(self, theta: float, responses: List[Dict], questions: List[Dict]) -> float:
+        """Standard error at an already-estimated ability"""
+        n = min(len(responses), len(questions))
+        information_sum = float(fisher_information(theta, *_item_parameters(questions[:n])).sum())
 
         if information_sum == 0:
             return 1.0
@@ -151,12 +365,13 @@ class AdaptiveAlgorithm:
                         questions: List[Dict], 
                         max_questions: int = None) -> Dict[str, Any]:
         """Determine if assessment should be terminated"""
-        max_q = max_questions or self.termination_criteria['max_questions']
-        min_q = self.termination_criteria['min_questions']
-        se_threshold = self.termination_criteria['standard_error_threshold']
+        max_q = max_questions or self.max_questions
+        min_q = self.min_questions
+        se_threshold = self.standard_error_threshold
 
         num_responses = len(responses)
-        standard_error = self.calculate_standard_error(responses, questions)
+        ability_estimate = self.estimate_ability(responses, questions)
+        standard_error = self.calculate_standard_error(responses, questions, theta=ability_estimate)
 
         termination_reasons = []
 
@@ -171,46 +386,29 @@ class AdaptiveAlgorithm:
             'reasons': termination_reasons,
             'num_questions': num_responses,
             'standard_error': standard_error,
-            'ability_estimate': self.estimate_ability(responses, questions)
+            'ability_estimate': ability_estimate
         }
 
     def generate_adaptive_questions(self, 
                                    user_id: str, 
                                    subject: str, 
                                    topics: List[str], 
-                                   config: Dict) -> List[Dict]:
+                                   config: Dict) -> Sequence[Dict]:
         """Generate questions for adaptive assessment"""
         # This would integrate with the question database and AI generator
         # For now, return a placeholder implementation
         
         total_questions = config.get('total_questions', 20)
-        questions = []
 
         # Generate questions using AI or database
-        for i in range(total_questions):
-            topic = topics[i % len(topics)] if topics else subject
-            
-            question_data = {
-                'id': f'adaptive_q_{i+1}',
-                'question_text': f'Adaptive question {i+1} about {topic}',
-                'options': [
-                    {'text': 'Option A', 'is_correct': False},
-                    {'text': 'Option B', 'is_correct': False},
-                    {'text': 'Option C', 'is_correct': True},
-                    {'text': 'Option D', 'is_correct': False}
-                ],
-                'correct_answer': 2,
-                'difficulty': 'medium',
-                'difficulty_score': 50 + (i * 2),  # Gradually increase difficulty
-                'subject': subject,
-                'topic': topic,
-                'discrimination': 0.5 + (i * 0.01),
-                'guessing': 0.25,
-                'upper_asymptote': 1.0
-            }
-            questions.append(question_data)
-
-        return questions
+        items = np.zeros(total_questions, dtype=ADAPTIVE_QUESTION_DTYPE)
+        steps = np.arange(total_questions)
+        items['difficulty_score'] = 50 + steps * 2  # Gradually increase difficulty
+        items['discrimination'] = 0.5 + steps * 0.01
+        items['guessing'] = 0.25
+        items['upper_asymptote'] = 1.0
+
+        return AdaptiveQuestionSet(subject, topics, items)
 
 # Global instance
 adaptive_algorithm = AdaptiveAlgorithm()
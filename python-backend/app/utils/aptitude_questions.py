@@ -3,8 +3,15 @@ Aptitude Questions utility for Python backend
 Equivalent to Node.js aptitudeQuestions.js
 """
 
+from itertools import chain
 from typing import List, Dict, Any
+from pymongo.errors import BulkWriteError
 from app.models.aptitude_test import AptitudeTest, AptitudeTestType, QuestionCategory, Difficulty, CognitiveLevel
+from app.logger import get_logger
+
+logger = get_logger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
 
 # Sample aptitude questions for different categories - CAT Level Difficulty
 SAMPLE_APTITUDE_QUESTIONS = {
@@ -135,13 +142,25 @@ SAMPLE_APTITUDE_QUESTIONS = {
     ]
 }
 
+# Fields of each sample question stored on an AptitudeTest
+QUESTION_FIELDS = (
+    "question_text", "options", "correct_answer", "explanation", "category",
+    "difficulty", "difficulty_score", "estimated_time", "skill_tested", "cognitive_level",
+)
+
+# Sample questions projected onto QUESTION_FIELDS, built once at import
+PROJECTED_QUESTIONS = {
+    test_type: [{field: q[field] for field in QUESTION_FIELDS} for q in questions]
+    for test_type, questions in SAMPLE_APTITUDE_QUESTIONS.items()
+}
+
 async def create_sample_aptitude_tests():
     """Create sample aptitude tests if they don't exist"""
     try:
         # Check if tests already exist
         existing_tests = await AptitudeTest.find(AptitudeTest.is_active == True).count()
         if existing_tests > 0:
-            print("Sample aptitude tests already exist")
+            logger.info("Sample aptitude tests already exist")
             return
 
         # Create Quantitative Aptitude Test
@@ -149,21 +168,7 @@ async def create_sample_aptitude_tests():
             title="Quantitative Aptitude - CAT Level",
             description="Advanced quantitative reasoning test with CAT-level difficulty",
             type=AptitudeTestType.QUANTITATIVE,
-            questions=[
-                {
-                    "question_text": q["question_text"],
-                    "options": q["options"],
-                    "correct_answer": q["correct_answer"],
-                    "explanation": q["explanation"],
-                    "category": q["category"],
-                    "difficulty": q["difficulty"],
-                    "difficulty_score": q["difficulty_score"],
-                    "estimated_time": q["estimated_time"],
-                    "skill_tested": q["skill_tested"],
-                    "cognitive_level": q["cognitive_level"]
-                }
-                for q in SAMPLE_APTITUDE_QUESTIONS["quantitative"]
-            ],
+            questions=PROJECTED_QUESTIONS["quantitative"],
             config={
                 "total_questions": len(SAMPLE_APTITUDE_QUESTIONS["quantitative"]),
                 "time_limit": 1800,  # 30 minutes
@@ -180,28 +185,13 @@ async def create_sample_aptitude_tests():
             is_active=True,
             created_by="system"
         )
-        await quantitative_test.insert()
 
         # Create Logical Reasoning Test
         logical_test = AptitudeTest(
             title="Logical Reasoning - CAT Level",
             description="Advanced logical reasoning test with CAT-level difficulty",
             type=AptitudeTestType.LOGICAL,
-            questions=[
-                {
-                    "question_text": q["question_text"],
-                    "options": q["options"],
-                    "correct_answer": q["correct_answer"],
-                    "explanation": q["explanation"],
-                    "category": q["category"],
-                    "difficulty": q["difficulty"],
-                    "difficulty_score": q["difficulty_score"],
-                    "estimated_time": q["estimated_time"],
-                    "skill_tested": q["skill_tested"],
-                    "cognitive_level": q["cognitive_level"]
-                }
-                for q in SAMPLE_APTITUDE_QUESTIONS["logical"]
-            ],
+            questions=PROJECTED_QUESTIONS["logical"],
             config={
                 "total_questions": len(SAMPLE_APTITUDE_QUESTIONS["logical"]),
                 "time_limit": 1200,  # 20 minutes
@@ -218,28 +208,13 @@ async def create_sample_aptitude_tests():
             is_active=True,
             created_by="system"
         )
-        await logical_test.insert()
 
         # Create Verbal Ability Test
         verbal_test = AptitudeTest(
             title="Verbal Ability - CAT Level",
             description="Advanced verbal ability test with CAT-level difficulty",
             type=AptitudeTestType.VERBAL,
-            questions=[
-                {
-                    "question_text": q["question_text"],
-                    "options": q["options"],
-                    "correct_answer": q["correct_answer"],
-                    "explanation": q["explanation"],
-                    "category": q["category"],
-                    "difficulty": q["difficulty"],
-                    "difficulty_score": q["difficulty_score"],
-                    "estimated_time": q["estimated_time"],
-                    "skill_tested": q["skill_tested"],
-                    "cognitive_level": q["cognitive_level"]
-                }
-                for q in SAMPLE_APTITUDE_QUESTIONS["verbal"]
-            ],
+            questions=PROJECTED_QUESTIONS["verbal"],
             config={
                 "total_questions": len(SAMPLE_APTITUDE_QUESTIONS["verbal"]),
                 "time_limit": 900,  # 15 minutes
@@ -256,29 +231,13 @@ async def create_sample_aptitude_tests():
             is_active=True,
             created_by="system"
         )
-        await verbal_test.insert()
 
         # Create Comprehensive Test
         comprehensive_test = AptitudeTest(
             title="Comprehensive Aptitude Test - CAT Level",
             description="Complete aptitude test covering all areas with CAT-level difficulty",
             type=AptitudeTestType.COMPREHENSIVE,
-            questions=[
-                {
-                    "question_text": q["question_text"],
-                    "options": q["options"],
-                    "correct_answer": q["correct_answer"],
-                    "explanation": q["explanation"],
-                    "category": q["category"],
-                    "difficulty": q["difficulty"],
-                    "difficulty_score": q["difficulty_score"],
-                    "estimated_time": q["estimated_time"],
-                    "skill_tested": q["skill_tested"],
-                    "cognitive_level": q["cognitive_level"]
-                }
-                for category in SAMPLE_APTITUDE_QUESTIONS.values()
-                for q in category
-            ],
+            questions=list(chain.from_iterable(PROJECTED_QUESTIONS.values())),
             config={
                 "total_questions": sum(len(category) for category in SAMPLE_APTITUDE_QUESTIONS.values()),
                 "time_limit": 3600,  # 60 minutes
@@ -305,10 +264,24 @@ async def create_sample_aptitude_tests():
             is_active=True,
             created_by="system"
         )
-        await comprehensive_test.insert()
 
-        print("✅ Sample aptitude tests created successfully")
+        # One bulk write for all four tests; updated_at already defaults to now,
+        # so skipping the per-document insert hooks loses nothing. Unordered, so a
+        # worker racing another one still inserts whatever that one has not
+        try:
+            await AptitudeTest.insert_many(
+                [quantitative_test, logical_test, verbal_test, comprehensive_test],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Titles already seeded hit the unique system-title index; anything else is real
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+            logger.info("Sample aptitude tests were seeded concurrently by another worker")
+            return
+
+        logger.info("✅ Sample aptitude tests created successfully")
         
     except Exception as e:
-        print(f"❌ Error creating sample aptitude tests: {e}")
+        logger.error("❌ Error creating sample aptitude tests: %s", e)
         raise e
@@ -0,0 +1,15 @@
+"""
+Aptitude test statistics for Python backend
+Vectorized helpers for scoring many aptitude tests at once
+"""
+
+import numpy as np
+
+# Effectiveness formula weights: balances completion rate and average score
+COMPLETION_WEIGHT = 0.4
+SCORE_WEIGHT = 0.6
+
+def effectiveness_batch(completion_rate: np.ndarray, average_score: np.ndarray, attempts: np.ndarray) -> np.ndarray:
+    """Calculate effectiveness for many tests; tests without attempts score 0"""
+    effectiveness = completion_rate * COMPLETION_WEIGHT + average_score * SCORE_WEIGHT
+    return np.where(attempts > 0, effectiveness, 0.0)
@@ -15,11 +15,16 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8001))
     debug = os.getenv("DEBUG", "True").lower() == "true"
+    # Single process by default: the auth, listing and dashboard caches are per process,
+    # so with more workers a change is only seen by the others once their TTL expires.
+    # Reload mode only supports a single worker
+    workers = 1 if debug else int(os.getenv("WEB_CONCURRENCY", 1))
     
     print("🚀 Starting Python Backend Server...")
     print(f"📡 Host: {host}")
     print(f"🔌 Port: {port}")
     print(f"🐛 Debug: {debug}")
+    print(f"👷 Workers: {workers}")
     print(f"📚 API Docs: http://{host}:{port}/docs")
     
     # Run the server
@@ -28,5 +33,9 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=debug,
-        log_level="info" if debug else "warning"
+        workers=workers,
+        log_level="info" if debug else "warning",
+        # uvloop and httptools ship with uvicorn[standard]; set EVENT_LOOP=asyncio where uvloop is unavailable
+        loop=os.getenv("EVENT_LOOP", "uvloop"),
+        http="httptools"
     )
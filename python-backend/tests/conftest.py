@@ -0,0 +1,28 @@
+"""
+Shared fixtures for Python backend tests
+"""
+
+import pytest_asyncio
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+import app.database as database
+from app.models.user import User
+from app.models.assessment import Assessment
+from app.models.question import Question
+from app.models.aptitude_test import AptitudeTest
+from app.models.aptitude_attempt import AptitudeAttempt
+
+@pytest_asyncio.fixture
+async def mongo():
+    """In-memory MongoDB with Beanie initialized; yields the raw database"""
+    client = AsyncMongoMockClient()
+    database.db.client = client
+    database.db.database = client.adaptive_assessment
+    database.db.analytics_database = client.adaptive_assessment
+    await init_beanie(
+        database=database.db.database,
+        document_models=[User, Assessment, Question, AptitudeTest, AptitudeAttempt]
+    )
+    yield database.db.database
+    database.db.client = database.db.database = database.db.analytics_database = None
@@ -1,29 +1,122 @@
 """
 Performance comparison tests between Node.js and Python backends
+
+Start the Python backend with uvloop and httptools (the run.py defaults, or
+`uvicorn app.main:app --port 8001 --loop uvloop --http httptools`); keep-alive
+on the default asyncio loop is markedly slower and would skew the comparison.
 """
 
+import os
+import shutil
 import asyncio
+import subprocess
 import time
 import httpx
-import json
-from typing import Dict, List, Any
-import statistics
+import orjson
+import numpy as np
+from typing import Dict, List, Any, Awaitable, Callable
+from functools import partial
+
+CPUFREQ_GOVERNOR = "/sys/devices/system/cpu/cpu{}/cpufreq/scaling_governor"
+
+def _read_governors() -> Dict[int, str]:
+    """Current cpufreq governor of every CPU that exposes one"""
+    governors = {}
+    for cpu in range(os.cpu_count() or 1):
+        try:
+            with open(CPUFREQ_GOVERNOR.format(cpu)) as f:
+                governors[cpu] = f.read().strip()
+        except OSError:
+            pass
+    return governors
 
 class PerformanceComparison:
     def __init__(self):
         self.nodejs_url = "http://localhost:5000"
         self.python_url = "http://localhost:8001"
+        # Requests issued back to back per timed sample, amortizing the timer cost
+        self.inner_batch = 50
+        # Requests issued, and kept in flight at once, when measuring throughput
+        self.throughput_requests = 500
+        self.concurrency = 50
+        # Untimed load across every endpoint before measuring, so V8's JIT and
+        # FastAPI's lazily built routes and caches reach steady state first
+        self.warmup_seconds = 5.0
+        self.warmup_requests = 500
         self.results = {
             "nodejs": {},
             "python": {}
         }
+        # One client for every request so connections are kept alive between iterations
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(30.0, connect=10.0)
+        )
+        self._timer_overhead = self._calibrate_overhead()
+        # CPU -> governor in effect before _configure_host changed it
+        self._previous_governors: Dict[int, str] = {}
+    
+    @staticmethod
+    def _calibrate_overhead(samples: int = 1000) -> float:
+        """Cost of an empty perf_counter() start/stop pair"""
+        overheads = []
+        for _ in range(samples):
+            start_time = time.perf_counter()
+            end_time = time.perf_counter()
+            overheads.append(end_time - start_time)
+        return min(overheads)
+    
+    def _configure_host(self):
+        """Best-effort host tuning: pin to one core, set the performance governor"""
+        # Migrations between cores and frequency changes make timings multimodal
+        if hasattr(os, "sched_setaffinity"):
+            cpu = int(os.getenv("BENCH_CPU", max(os.sched_getaffinity(0))))
+            try:
+                os.sched_setaffinity(0, {cpu})
+                print(f"📌 Pinned benchmark to CPU {cpu}")
+            except OSError as e:
+                print(f"⚠️  Could not pin to CPU {cpu}: {e}")
+        
+        if shutil.which("cpupower") and os.geteuid() == 0:
+            # Remembered per CPU so _restore_host can put the host back as it was
+            previous = _read_governors()
+            result = subprocess.run(
+                ["cpupower", "frequency-set", "-g", "performance"],
+                capture_output=True
+            )
+            if result.returncode == 0:
+                self._previous_governors = previous
+                print("⚙️  CPU governor set to performance")
+        else:
+            print("⚠️  CPU governor unchanged (needs root and cpupower)")
+    
+    def _restore_host(self):
+        """Put back the CPU governors _configure_host replaced"""
+        by_governor: Dict[str, List[int]] = {}
+        for cpu, governor in self._previous_governors.items():
+            by_governor.setdefault(governor, []).append(cpu)
+        for governor, cpus in by_governor.items():
+            subprocess.run(
+                ["cpupower", "-c", ",".join(map(str, cpus)), "frequency-set", "-g", governor],
+                capture_output=True
+            )
+        if self._previous_governors:
+            print(f"⚙️  CPU governor restored to {', '.join(by_governor)}")
+        self._previous_governors = {}
+    
+    async def aclose(self):
+        """Close the shared HTTP client"""
+        await self._client.aclose()
     
     async def test_endpoint_performance(
         self, 
         endpoint: str, 
         method: str = "GET", 
         data: Dict = None,
-        headers: Dict = None
+        headers: Dict = None,
+        min_iterations: int = 10,
+        warmup: int = 5,
+        duration_s: float = 5.0
     ) -> Dict[str, Any]:
         """Test performance of a specific endpoint"""
         
@@ -35,71 +128,170 @@ class PerformanceComparison:
         # Test Node.js backend
         nodejs_times = await self._test_backend(
             f"{self.nodejs_url}{endpoint}",
-            method, data, headers, 10
+            method, data, headers, min_iterations, warmup, duration_s
         )
         results["nodejs"] = nodejs_times
         
         # Test Python backend
         python_times = await self._test_backend(
             f"{self.python_url}{endpoint}",
-            method, data, headers, 10
+            method, data, headers, min_iterations, warmup, duration_s
         )
         results["python"] = python_times
         
         return results
     
+    def _bind_request(self, url: str, method: str, data: Dict, headers: Dict) -> Callable[[], Awaitable[httpx.Response]]:
+        """Resolve a request on the shared client once, so timed loops only await it"""
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported method: {method}")
+        return partial(self._client.request, method, url, json=data if method == "POST" else None, headers=headers)
+    
     async def _test_backend(
         self, 
         url: str, 
         method: str, 
         data: Dict, 
         headers: Dict, 
-        iterations: int
+        min_iterations: int,
+        warmup: int = 5,
+        duration_s: float = 5.0
     ) -> Dict[str, Any]:
-        """Test a specific backend"""
+        """Test a specific backend for at least duration_s and min_iterations batches"""
         
-        times = []
+        # Raw batch durations in a preallocated buffer, doubled if the run outgrows it
+        batch_times = np.empty(max(min_iterations, 1024), dtype=np.float64)
+        samples = 0
         errors = 0
+        iterations = 0
+        last_error = None
+        http_version = None
+        request = self._bind_request(url, method, data, headers)
         
-        async with httpx.AsyncClient() as client:
-            for i in range(iterations):
-                try:
-                    start_time = time.time()
-                    
-                    if method == "GET":
-                        response = await client.get(url, headers=headers)
-                    elif method == "POST":
-                        response = await client.post(url, json=data, headers=headers)
-                    else:
-                        raise ValueError(f"Unsupported method: {method}")
-                    
-                    end_time = time.time()
-                    
-                    if response.status_code < 400:
-                        times.append(end_time - start_time)
-                    else:
+        # Untimed requests first so connection setup and cold code paths stay out of the samples
+        for _ in range(warmup):
+            try:
+                response = await request()
+                http_version = http_version or response.http_version
+            except httpx.HTTPError:
+                pass
+        
+        run_start = time.perf_counter()
+        deadline = run_start + duration_s
+        while time.perf_counter() < deadline or iterations < min_iterations:
+            iterations += 1
+            batch_ok = True
+            start_time = time.perf_counter()
+            
+            # One handler around the batch; error statuses come back as responses, and any
+            # httpx failure is counted rather than ending the run and its samples
+            try:
+                for i in range(self.inner_batch):
+                    response = await request()
+                    http_version = http_version or response.http_version
+                    if response.status_code >= 400:
                         errors += 1
+                        batch_ok = False
                         
-                except Exception as e:
-                    errors += 1
-                    print(f"Error testing {url}: {e}")
+            except httpx.HTTPError as e:
+                # The failed request and the rest of the batch it cut short
+                errors += self.inner_batch - i
+                batch_ok = False
+                # Reported once after the loop, keeping stdout writes out of the timed path
+                last_error = repr(e)
+            
+            end_time = time.perf_counter()
+            
+            # Kept only when every request in the batch succeeded
+            if batch_ok:
+                if samples == batch_times.size:
+                    batch_times = np.resize(batch_times, 2 * samples)
+                batch_times[samples] = end_time - start_time
+                samples += 1
         
-        success_rate = ((iterations - errors) / iterations) * 100
+        elapsed = time.perf_counter() - run_start
+        # Per-request times with the timer's own cost taken out
+        times = (batch_times[:samples] - self._timer_overhead) / self.inner_batch
+        total_requests = iterations * self.inner_batch
+        if errors:
+            print(f"{errors}/{total_requests} errors on {url}; last: {last_error or 'HTTP error status'}")
+        success_rate = ((total_requests - errors) / total_requests) * 100
+        throughput = await self._test_throughput(url, method, data, headers)
         
         return {
-            "times": times,
+            "times": times.tolist(),
             "errors": errors,
+            "total_requests": total_requests,
+            # Protocol the server negotiated, to confirm what was actually measured
+            "http_version": http_version,
+            "serial_rps": (total_requests - errors) / elapsed if elapsed > 0 else 0,
             "success_rate": success_rate,
-            "avg_time": statistics.mean(times) if times else 0,
-            "min_time": min(times) if times else 0,
-            "max_time": max(times) if times else 0,
-            "median_time": statistics.median(times) if times else 0
+            "avg_time": float(times.mean()) if times.size else 0,
+            "min_time": float(times.min()) if times.size else 0,
+            # Timing noise (scheduling, GC, interrupts) only ever adds time, so the
+            # fastest run is the most stable estimate and is what comparisons use
+            "best_time": float(times.min()) if times.size else 0,
+            # Share of the fastest request taken by the timer itself
+            "overhead_pct": self._timer_overhead / self.inner_batch / float(times.min()) * 100 if times.size else 0,
+            "max_time": float(times.max()) if times.size else 0,
+            "median_time": float(np.median(times)) if times.size else 0,
+            **throughput
+        }
+    
+    async def _test_throughput(self, url: str, method: str, data: Dict, headers: Dict) -> Dict[str, Any]:
+        """Issue throughput_requests requests with up to concurrency in flight"""
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        request = self._bind_request(url, method, data, headers)
+        
+        async def one():
+            async with semaphore:
+                start_time = time.perf_counter()
+                response = await request()
+                return time.perf_counter() - start_time, response.status_code
+        
+        start_time = time.perf_counter()
+        outcomes = await asyncio.gather(*[one() for _ in range(self.throughput_requests)], return_exceptions=True)
+        wall_time = time.perf_counter() - start_time
+        
+        concurrent_times = [o[0] for o in outcomes if not isinstance(o, BaseException) and o[1] < 400]
+        p50, p95, p99 = np.percentile(concurrent_times, [50, 95, 99]) if concurrent_times else (0, 0, 0)
+        return {
+            "concurrency": self.concurrency,
+            "concurrent_times": concurrent_times,
+            "concurrent_errors": len(outcomes) - len(concurrent_times),
+            "wall_time": wall_time,
+            "rps": len(concurrent_times) / wall_time if wall_time > 0 else 0,
+            # Tail latencies come from individually timed requests; serial samples are batch averages
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99)
         }
     
+    async def _warmup(self, test_cases: List[Dict[str, Any]]):
+        """Cycle through every endpoint on both backends, discarding timings"""
+        requests = [
+            self._bind_request(f"{base_url}{test_case['endpoint']}", test_case["method"], None, None)
+            for test_case in test_cases
+            for base_url in (self.nodejs_url, self.python_url)
+        ]
+        
+        issued = 0
+        deadline = time.perf_counter() + self.warmup_seconds
+        while time.perf_counter() < deadline or issued < self.warmup_requests:
+            try:
+                await requests[issued % len(requests)]()
+            except httpx.HTTPError:
+                pass
+            issued += 1
+        
+        print(f"🔥 Warmed up with {issued} requests")
+    
     async def run_comprehensive_test(self) -> Dict[str, Any]:
         """Run comprehensive performance comparison"""
         
         print("🚀 Starting Performance Comparison Test")
+        print(f"⏱️ Timer overhead: {self._timer_overhead * 1e9:.0f}ns (subtracted from every sample)")
         print("=" * 50)
         
         # Test endpoints
@@ -121,6 +313,8 @@ class PerformanceComparison:
             }
         ]
         
+        await self._warmup(test_cases)
+        
         results = {}
         
         for test_case in test_cases:
@@ -150,51 +344,63 @@ class PerformanceComparison:
         """Print test results for a specific test"""
         
         print(f"Node.js Backend:")
+        print(f"  Best Time: {results['nodejs']['best_time']:.4f}s")
         print(f"  Average Time: {results['nodejs']['avg_time']:.4f}s")
         print(f"  Success Rate: {results['nodejs']['success_rate']:.1f}%")
         print(f"  Errors: {results['nodejs']['errors']}")
+        print(f"  Protocol: {results['nodejs']['http_version'] or 'n/a'}")
+        print(f"  Throughput: {results['nodejs']['rps']:.1f} req/s at concurrency {results['nodejs']['concurrency']}")
+        print(f"  P50/P95/P99: {results['nodejs']['p50']:.4f}s / {results['nodejs']['p95']:.4f}s / {results['nodejs']['p99']:.4f}s")
+        if results['nodejs']['overhead_pct'] > 10:
+            print(f"  ⚠️ overhead {results['nodejs']['overhead_pct']:.1f}% — result unreliable")
         
         print(f"Python Backend:")
+        print(f"  Best Time: {results['python']['best_time']:.4f}s")
         print(f"  Average Time: {results['python']['avg_time']:.4f}s")
         print(f"  Success Rate: {results['python']['success_rate']:.1f}%")
         print(f"  Errors: {results['python']['errors']}")
+        print(f"  Protocol: {results['python']['http_version'] or 'n/a'}")
+        print(f"  Throughput: {results['python']['rps']:.1f} req/s at concurrency {results['python']['concurrency']}")
+        print(f"  P50/P95/P99: {results['python']['p50']:.4f}s / {results['python']['p95']:.4f}s / {results['python']['p99']:.4f}s")
+        if results['python']['overhead_pct'] > 10:
+            print(f"  ⚠️ overhead {results['python']['overhead_pct']:.1f}% — result unreliable")
         
         # Compare performance
-        if results['nodejs']['avg_time'] > 0 and results['python']['avg_time'] > 0:
-            speed_diff = ((results['python']['avg_time'] - results['nodejs']['avg_time']) / results['nodejs']['avg_time']) * 100
+        if results['nodejs']['best_time'] > 0 and results['python']['best_time'] > 0:
+            speed_diff = ((results['python']['best_time'] - results['nodejs']['best_time']) / results['nodejs']['best_time']) * 100
             faster_backend = "Node.js" if speed_diff > 0 else "Python"
             print(f"  🏆 {faster_backend} is {abs(speed_diff):.1f}% faster")
     
+    @staticmethod
+    def _aggregate(results: Dict[str, Any], backend: str) -> Dict[str, Any]:
+        """Pool one backend's samples across every test and reduce them in NumPy"""
+        tests = [test_results[backend] for test_results in results.values()]
+        times = np.fromiter((t for r in tests for t in r['times']), dtype=np.float64)
+        concurrent_times = np.fromiter((t for r in tests for t in r['concurrent_times']), dtype=np.float64)
+        p95, p99 = np.percentile(concurrent_times, [95, 99]) if concurrent_times.size else (0, 0)
+        
+        return {
+            "best_time": sum(r['best_time'] for r in tests),
+            "avg_time": float(times.mean()) if times.size else 0,
+            "median_time": float(np.median(times)) if times.size else 0,
+            # Pooled over every request rather than averaged per test, so the tail is not undersampled
+            "p95": float(p95),
+            "p99": float(p99),
+            "total_errors": sum(r['errors'] for r in tests),
+            "total_tests": int(times.size)
+        }
+    
     def _generate_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
         """Generate performance summary"""
         
-        nodejs_times = []
-        python_times = []
-        nodejs_errors = 0
-        python_errors = 0
-        
-        for test_name, test_results in results.items():
-            nodejs_times.extend(test_results['nodejs']['times'])
-            python_times.extend(test_results['python']['times'])
-            nodejs_errors += test_results['nodejs']['errors']
-            python_errors += test_results['python']['errors']
-        
         summary = {
-            "nodejs": {
-                "avg_time": statistics.mean(nodejs_times) if nodejs_times else 0,
-                "total_errors": nodejs_errors,
-                "total_tests": len(nodejs_times)
-            },
-            "python": {
-                "avg_time": statistics.mean(python_times) if python_times else 0,
-                "total_errors": python_errors,
-                "total_tests": len(python_times)
-            }
+            "nodejs": self._aggregate(results, "nodejs"),
+            "python": self._aggregate(results, "python")
         }
         
-        # Calculate overall winner
-        if summary['nodejs']['avg_time'] > 0 and summary['python']['avg_time'] > 0:
-            speed_diff = ((summary['python']['avg_time'] - summary['nodejs']['avg_time']) / summary['nodejs']['avg_time']) * 100
+        # Calculate overall winner from the summed per-endpoint best times
+        if summary['nodejs']['best_time'] > 0 and summary['python']['best_time'] > 0:
+            speed_diff = ((summary['python']['best_time'] - summary['nodejs']['best_time']) / summary['nodejs']['best_time']) * 100
             summary['winner'] = "Node.js" if speed_diff > 0 else "Python"
             summary['speed_difference'] = abs(speed_diff)
         
@@ -208,12 +414,18 @@ class PerformanceComparison:
         print("=" * 50)
         
         print(f"Node.js Backend:")
+        print(f"  Total Best Time: {summary['nodejs']['best_time']:.4f}s")
         print(f"  Overall Average Time: {summary['nodejs']['avg_time']:.4f}s")
+        print(f"  Overall Median Time: {summary['nodejs']['median_time']:.4f}s")
+        print(f"  Pooled P95/P99: {summary['nodejs']['p95']:.4f}s / {summary['nodejs']['p99']:.4f}s")
         print(f"  Total Errors: {summary['nodejs']['total_errors']}")
         print(f"  Total Tests: {summary['nodejs']['total_tests']}")
         
         print(f"\nPython Backend:")
+        print(f"  Total Best Time: {summary['python']['best_time']:.4f}s")
         print(f"  Overall Average Time: {summary['python']['avg_time']:.4f}s")
+        print(f"  Overall Median Time: {summary['python']['median_time']:.4f}s")
+        print(f"  Pooled P95/P99: {summary['python']['p95']:.4f}s / {summary['python']['p99']:.4f}s")
         print(f"  Total Errors: {summary['python']['total_errors']}")
         print(f"  Total Tests: {summary['python']['total_tests']}")
         
@@ -222,7 +434,7 @@ class PerformanceComparison:
             print(f"   Speed Difference: {summary['speed_difference']:.1f}%")
         
         print("\n💡 Recommendations:")
-        if summary['nodejs']['avg_time'] < summary['python']['avg_time']:
+        if summary['nodejs']['best_time'] < summary['python']['best_time']:
             print("   - Node.js shows better raw performance")
             print("   - Consider Node.js for high-throughput scenarios")
         else:
@@ -264,13 +476,24 @@ async def main():
     
     # Run performance comparison
     comparison = PerformanceComparison()
-    results = await comparison.run_comprehensive_test()
+    try:
+        comparison._configure_host()
+        results = await comparison.run_comprehensive_test()
+    finally:
+        comparison._restore_host()
+        await comparison.aclose()
     
     # Save results to file
-    with open("performance_results.json", "w") as f:
-        json.dump(results, f, indent=2, default=str)
+    with open("performance_results.json", "wb") as f:
+        f.write(orjson.dumps(results, default=str, option=orjson.OPT_INDENT_2))
     
     print(f"\n📄 Results saved to: performance_results.json")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Drive the client on uvloop too when available, so it is not the bottleneck
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
@@ -0,0 +1,135 @@
+"""
+Tests for the adaptive algorithm
+"""
+
+import math
+import numpy as np
+import pytest
+from app.utils.ability_math import IRT_SCALING, fisher_information
+from app.utils.adaptive_algorithm import AdaptiveAlgorithm, AdaptiveSession, ItemBank
+
+def reference_estimate_ability(responses, questions):
+    """Ability maximizing the response log-likelihood, by brute force over [-4, 4]"""
+    best_theta, best_log_likelihood = 0.0, -math.inf
+    for step in range(8001):
+        theta = -4.0 + step * 0.001
+        log_likelihood = 0.0
+        for response, question in zip(responses, questions):
+            a = question.get('discrimination', 0.5)
+            b = question.get('difficulty', 0.5)
+            c = question.get('guessing', 0.25)
+            d = question.get('upper_asymptote', 1.0)
+            p = c + (d - c) / (1 + math.exp(-IRT_SCALING * a * (theta - b)))
+            log_likelihood += math.log(p) if response.get('is_correct', 0) else math.log(1 - p)
+        if log_likelihood > best_log_likelihood:
+            best_theta, best_log_likelihood = theta, log_likelihood
+    return best_theta
+
+def make_questions(count):
+    return [
+        {'id': f'q{i}', 'discrimination': 0.5 + i * 0.05, 'difficulty': -1.0 + i * 0.2,
+         'guessing': 0.2, 'upper_asymptote': 0.98}
+        for i in range(count)
+    ]
+
+def test_estimate_ability_no_responses():
+    assert AdaptiveAlgorithm().estimate_ability([], make_questions(3)) == 0.0
+
+@pytest.mark.parametrize("pattern", [
+    [True, False, True, True, False, True, False, True, True, False],
+    [i % 3 != 0 for i in range(10)],
+])
+def test_estimate_ability_maximizes_likelihood(pattern):
+    questions = make_questions(len(pattern))
+    responses = [{'is_correct': correct} for correct in pattern]
+    expected = reference_estimate_ability(responses, questions)
+    assert AdaptiveAlgorithm().estimate_ability(responses, questions) == pytest.approx(expected, abs=0.01)
+
+def test_estimate_ability_ignores_responses_without_questions():
+    questions = make_questions(4)
+    responses = [{'is_correct': correct} for correct in (True, False, True, False, True, True)]
+    expected = reference_estimate_ability(responses[:4], questions)
+    assert AdaptiveAlgorithm().estimate_ability(responses, questions) == pytest.approx(expected, abs=0.01)
+
+def test_estimate_ability_all_correct_stops_at_grid_edge():
+    questions = make_questions(5)
+    responses = [{'is_correct': True}] * 5
+    assert AdaptiveAlgorithm().estimate_ability(responses, questions) == 4.0
+
+def test_select_next_question_picks_most_informative_unanswered():
+    algorithm = AdaptiveAlgorithm()
+    questions = make_questions(10)
+    answered = ['q3', 'q4']
+    unanswered = [q for q in questions if q['id'] not in answered]
+    expected = max(unanswered, key=lambda q: algorithm.calculate_information(0.4, q))
+
+    assert algorithm.select_next_question(0.4, questions, answered) is expected
+    assert algorithm.select_next_question(0.4, ItemBank(questions), answered) is expected
+    assert algorithm.select_next_question(0.4, questions, [q['id'] for q in questions]) is None
+
+def test_standard_error_matches_scalar_information_sum():
+    algorithm = AdaptiveAlgorithm()
+    questions = make_questions(6)
+    responses = [{'is_correct': correct} for correct in (True, True, False, True, False, True, True)]
+    information_sum = sum(algorithm.calculate_information(0.2, q) for q in questions)
+    assert algorithm.calculate_standard_error(responses, questions, theta=0.2) == pytest.approx(1.0 / math.sqrt(information_sum))
+
+def test_information_matches_shared_3pl_kernel():
+    question = {'discrimination': 0.8, 'difficulty': 0.3, 'guessing': 0.2}
+    expected = fisher_information(0.5, np.array([0.8]), np.array([0.3]), np.array([0.2]))[0]
+    assert AdaptiveAlgorithm().calculate_information(0.5, question) == pytest.approx(expected)
+
+def test_item_bank_information_table_matches_direct_selection():
+    questions = make_questions(10)
+    direct = ItemBank(questions)
+    tabulated = ItemBank(questions, precompute_information=True)
+    for theta in (-5.0, -1.3, 0.0, 0.4, 2.7):
+        assert tabulated.most_informative(theta, ['q2']) is direct.most_informative(theta, ['q2'])
+
+def test_item_bank_information_table_breaks_ties_at_zero():
+    # The strong item dominates every row, so the weak ones all quantize to 0
+    questions = [{'id': 'strong', 'discrimination': 3.0, 'difficulty': 0.0, 'guessing': 0.0}] + [
+        {'id': f'weak{i}', 'discrimination': 0.05 + 0.01 * i, 'difficulty': 0.0, 'guessing': 0.25}
+        for i in range(3)
+    ]
+    bank = ItemBank(questions, precompute_information=True)
+    assert not bank.info_table[bank._grid_index(0.0)][1:].any()
+    assert bank.most_informative(0.0, ['strong'])['id'] == 'weak2'
+
+def test_adaptive_session_matches_dict_estimate():
+    questions = make_questions(8)
+    outcomes = [True, False, True, True, False, True]
+    session = AdaptiveSession(ItemBank(questions), max_questions=6)
+    for question, correct in zip(questions[2:], outcomes):
+        session.record_response(question['id'], correct)
+
+    responses = [{'is_correct': correct} for correct in outcomes]
+    expected = AdaptiveAlgorithm().estimate_ability(responses, questions[2:])
+    assert session.estimate_ability() == pytest.approx(expected)
+    assert session.next_question(expected)['id'] in ('q0', 'q1')
+    with pytest.raises(ValueError):
+        session.record_response('q0', True)
+
+def test_select_next_question_random_fallback():
+    algorithm = AdaptiveAlgorithm()
+    algorithm.question_selection_strategy = 'random'
+    questions = make_questions(3)
+    assert algorithm.select_next_question(0.0, questions, ['q0', 'q1']) is questions[2]
+
+def test_item_bank_estimates_abilities_in_batch():
+    algorithm = AdaptiveAlgorithm()
+    questions = make_questions(8)
+    bank = ItemBank(questions)
+    patterns = {0: True, 2: False, 3: True, 5: True, 6: False}, {1: False, 4: True}, {}
+    outcomes = np.zeros((len(patterns), len(questions)))
+    answered = np.zeros((len(patterns), len(questions)), dtype=bool)
+    for row, pattern in enumerate(patterns):
+        for position, correct in pattern.items():
+            outcomes[row, position] = correct
+            answered[row, position] = True
+
+    expected = [
+        algorithm.estimate_ability([{'is_correct': c} for c in pattern.values()], [questions[i] for i in pattern])
+        for pattern in patterns
+    ]
+    assert bank.estimate_abilities(outcomes, answered) == pytest.approx(expected)
@@ -0,0 +1,24 @@
+"""
+Tests for the analytics routes
+"""
+
+import pytest
+from app.models.aptitude_test import COMPLETION_WEIGHT, SCORE_WEIGHT
+from app.routes.analytics import get_aptitude_effectiveness
+
+@pytest.mark.asyncio
+async def test_aptitude_effectiveness_uses_running_totals(mongo):
+    await mongo.aptitude_tests.insert_many([
+        # Current documents: running totals only
+        {"title": "totals", "usage_stats": {"total_attempts": 4, "total_score_sum": 280.0, "total_completed_count": 3}},
+        # Stored before the running totals existed
+        {"title": "legacy", "usage_stats": {"total_attempts": 2, "average_score": 50.0, "completion_rate": 0.5}},
+        {"title": "unused", "usage_stats": {"total_attempts": 0, "total_score_sum": 0.0, "total_completed_count": 0}}
+    ])
+
+    response = await get_aptitude_effectiveness(admin_user=None)
+    effectiveness = {test["title"]: test["effectiveness"] for test in response["tests"]}
+
+    assert effectiveness["totals"] == pytest.approx(0.75 * COMPLETION_WEIGHT + 70.0 * SCORE_WEIGHT)
+    assert effectiveness["legacy"] == pytest.approx(0.5 * COMPLETION_WEIGHT + 50.0 * SCORE_WEIGHT)
+    assert effectiveness["unused"] == 0.0
@@ -0,0 +1,59 @@
+"""
+Tests for the AptitudeTest model
+"""
+
+import pytest
+from app.models.aptitude_test import AptitudeQuestion, AptitudeTest, UsageStats
+
+def make_question(category, difficulty):
+    return AptitudeQuestion(
+        question_text="q", options=[{"text": "a", "is_correct": True}, {"text": "b"}], correct_answer=0,
+        category=category, difficulty=difficulty, skill_tested="s"
+    )
+
+def test_usage_stats_backfills_totals_from_stored_averages():
+    stats = UsageStats.model_validate({"total_attempts": 4, "average_score": 62.5, "completion_rate": 0.75})
+    assert stats.total_score_sum == 250.0
+    assert stats.total_completed_count == 3
+    assert stats.average_score == 62.5
+    assert stats.completion_rate == 0.75
+
+def test_usage_stats_derives_averages_from_totals():
+    stats = UsageStats.model_validate({"total_attempts": 2, "total_score_sum": 150.0, "total_completed_count": 1})
+    assert stats.average_score == 75.0
+    assert stats.completion_rate == 0.5
+
+@pytest.mark.asyncio
+async def test_update_usage_stats_keeps_running_totals(mongo):
+    test = AptitudeTest(title="t", type="logical", created_by="u")
+    for score, completed in [(80.0, True), (40.0, False), (90.0, True)]:
+        test.update_usage_stats(score, completed)
+
+    stats = test.usage_stats
+    assert stats.total_attempts == 3
+    assert stats.total_score_sum == 210.0
+    assert stats.total_completed_count == 2
+    assert stats.average_score == pytest.approx(70.0)
+    assert stats.completion_rate == pytest.approx(2 / 3)
+
+@pytest.mark.asyncio
+async def test_usage_stats_averages_are_stored(mongo):
+    test = AptitudeTest(title="t", type="logical", created_by="u")
+    test.update_usage_stats(50.0, True)
+    await test.insert()
+
+    stored = await mongo.aptitude_tests.find_one({"_id": test.id})
+    assert stored["usage_stats"]["average_score"] == 50.0
+    assert stored["usage_stats"]["completion_rate"] == 1.0
+    assert stored["usage_stats"]["total_score_sum"] == 50.0
+
+@pytest.mark.asyncio
+async def test_question_filters_see_in_place_changes(mongo):
+    test = AptitudeTest(title="t", type="logical", created_by="u", questions=[make_question("algebra", "easy")])
+    assert len(test.get_questions_by_category("algebra")) == 1
+
+    test.questions.append(make_question("algebra", "hard"))
+    test.questions[0] = make_question("geometry", "easy")
+
+    assert [q.difficulty for q in test.get_questions_by_category("algebra")] == ["hard"]
+    assert [q.category for q in test.get_questions_by_difficulty("easy")] == ["geometry"]
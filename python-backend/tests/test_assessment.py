@@ -0,0 +1,69 @@
+"""
+Tests for the Assessment model
+"""
+
+import pytest
+from datetime import datetime
+from app.models.assessment import Assessment, AssessmentQuestion, ItemParameters
+from app.routes.assessments import auto_submit_pipeline
+from app.utils.ability_math import item_difficulty
+
+def make_assessment(difficulty_scores, adaptive=True, final_ability=0.0):
+    assessment = Assessment(
+        user_id="u", assessment_type="practice", title="t", subject="s",
+        config={"totalQuestions": len(difficulty_scores), "timeLimit": 600, "adaptiveEnabled": adaptive},
+        questions=[
+            AssessmentQuestion(
+                question_id=f"q_{i + 1}", order=i + 1,
+                item_parameters=ItemParameters(difficulty=item_difficulty(score))
+            )
+            for i, score in enumerate(difficulty_scores)
+        ]
+    )
+    assessment.adaptive_data.final_ability = final_ability
+    return assessment
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ability, expected", [(-1.0, "q_1"), (0.4, "q_2"), (1.6, "q_3")])
+async def test_adaptive_next_question_matches_ability(mongo, ability, expected):
+    assessment = make_assessment([30, 60, 85], final_ability=ability)
+    assert assessment.get_next_question().question_id == expected
+
+@pytest.mark.asyncio
+async def test_next_question_skips_answered(mongo):
+    assessment = make_assessment([30, 60, 85], adaptive=False)
+    assessment.questions[0].is_answered = True
+    assert assessment.get_next_question().question_id == "q_2"
+
+    for question in assessment.questions:
+        question.is_answered = True
+    assert assessment.get_next_question() is None
+
+@pytest.mark.asyncio
+async def test_auto_submit_pipeline_scores_in_database(mongo):
+    def responses(*answers):
+        return [{"is_answered": a is not None, "is_correct": a} for a in answers]
+
+    now = datetime(2026, 1, 1)
+    await mongo.assessments.insert_many([
+        {"title": "pass", "status": "in-progress", "config": {"passingScore": 50}, "questions": responses(True, False, None)},
+        {"title": "fail", "status": "in-progress", "config": {"passingScore": 70}, "questions": responses(True, True, False, None)},
+        {"title": "default", "status": "in-progress", "config": {}, "questions": responses(None, None)},
+    ])
+    result = await mongo.assessments.update_many({"status": "in-progress"}, auto_submit_pipeline(now))
+    assert result.modified_count == 3
+
+    docs = {doc["title"]: doc async for doc in mongo.assessments.find()}
+    assert docs["pass"]["results"]["passed"] is True
+    assert docs["pass"]["results"]["answered_questions"] == 2
+    assert docs["pass"]["results"]["skipped_questions"] == 1
+    assert docs["fail"]["results"]["percentage"] == pytest.approx(200 / 3)
+    assert docs["fail"]["results"]["passed"] is False
+    assert docs["fail"]["results"]["incorrect_answers"] == 1
+    assert docs["default"]["results"]["skipped_questions"] == 2
+    assert docs["default"]["results"]["passed"] is False
+    for doc in docs.values():
+        assert doc["status"] == "completed"
+        assert doc["auto_submitted"] is True
+        assert doc["end_time"] == now
+        assert "_answered" not in doc
@@ -0,0 +1,27 @@
+"""
+Tests for the startup migrations
+"""
+
+import pytest
+from datetime import datetime
+from app.database import migrate_aptitude_history
+
+def legacy_history():
+    return [
+        {"test_id": f"t{i}", "test_title": f"Test {i}", "test_type": "logical", "score": 50.0 + i,
+         "passed": False, "completed_at": datetime(2024, 1, i + 1), "time_spent": 60.0, "answers": []}
+        for i in range(2)
+    ]
+
+@pytest.mark.asyncio
+async def test_migrate_aptitude_history_is_idempotent(mongo):
+    user_id = (await mongo.users.insert_one({"first_name": "A", "aptitude_history": legacy_history()})).inserted_id
+
+    await migrate_aptitude_history()
+    # A restart between the insert and the $unset finds the same history again
+    await mongo.users.update_one({"_id": user_id}, {"$set": {"aptitude_history": legacy_history()}})
+    await migrate_aptitude_history()
+
+    attempts = await mongo.aptitude_attempts.find({"user_id": str(user_id)}).to_list(length=None)
+    assert sorted(a["test_id"] for a in attempts) == ["t0", "t1"]
+    assert "aptitude_history" not in await mongo.users.find_one({"_id": user_id})
@@ -0,0 +1,20 @@
+"""
+Tests for the User model
+"""
+
+import pytest
+from app.models.user import User
+
+@pytest.mark.asyncio
+async def test_full_name_search_follows_name_changes(mongo):
+    user = User(email="ada@example.com", password="secret1", first_name="Ada", last_name="Lovelace", institution="i")
+    await user.insert()
+    assert user.full_name_search == "ada lovelace"
+
+    await user.set({User.first_name: "Augusta"})
+    stored = await mongo.users.find_one({"_id": user.id})
+    assert stored["full_name_search"] == "augusta lovelace"
+
+    await user.set({"last_name": "King"})
+    stored = await mongo.users.find_one({"_id": user.id})
+    assert stored["full_name_search"] == "augusta king"